@@ -0,0 +1,478 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Amaury Behague <amaury.behague@gmail.com>
+#
+# This file is part of cryptoguru.
+#
+# cryptopwn is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "Amaury Behague"
+__copyright__ = "Copyright 2016, Amaury Behague"
+__license__ = "GPL"
+__version__ = "3"
+__email__ = "amaury.behague@gmail.com"
+__status__ = "Beta"
+
+"""
+.. module:: bench
+	:platform: Unix
+	:synopsis: Benchmarks of the package's building blocks.
+
+.. moduleauthor:: Amaury Behague <amaury.behague@gmail.com>
+
+Usage : python bench.py [name ...] (runs every benchmark if no name is given)
+"""
+
+import gf2, itools, pwndlp, pyfacto, random, resource, sys, time
+
+random.seed()
+
+
+def timeit(f, *args):
+	"""Times a single call.
+
+	Args:
+		- *f (function)*: the function to call
+		- *args*: its arguments
+
+	Returns:
+		- *(float,object)*: the elapsed time in seconds and the value returned by f.
+	"""
+
+	t0 = time.monotonic()
+	r = f(*args)
+	t1 = time.monotonic()
+	return t1-t0, r
+
+
+#former itools.get_primes : k rounds of Rabin-Miller on every integer
+def _get_primes_rm(a,b,k):
+	primes = []
+	if(a<5):
+		start = 5
+		primes = [2,3]
+	else:
+		start = a
+	for n in range(start,b):
+		if(itools.rabin_miller(n,k)):
+			primes.append(n)
+	return primes
+
+
+def bench_primes(bounds=(10**4, 10**5, 10**6)):
+	"""Segmented sieve (:func:`itools.get_primes`) against Rabin-Miller on every integer.
+
+	Optional Args:
+		- *bounds (List)*: the values of B, primes are listed in [1,B[.
+	"""
+
+	print("\n==== get_primes(1,B) ====")
+	print("B\t\tsieve\t\trabin_miller(k=20)")
+	for B in bounds:
+		ts, Ls = timeit(itools.get_primes, 1, B)
+		tr, Lr = timeit(_get_primes_rm, 1, B, 20)
+		print("{0}\t\t{1:.4f} s\t{2:.4f} s\t({3} primes, same : {4})".format(B, ts, tr, len(Ls), Ls==Lr))
+
+
+def bench_primality(sizes=(32, 64, 128, 256, 512, 1024, 2048), count=200):
+	"""Deterministic test (:func:`itools.is_probable_prime`) against :func:`itools.rabin_miller` (k=10).
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of the inputs.
+		- *count (int)*: number of random odd inputs per size (fewer above 512 bits).
+	"""
+
+	print("\n==== primality, random odd inputs ====")
+	print("bits\tinputs\tis_probable_prime\trabin_miller(k=10)")
+	for bits in sizes:
+		c = count if bits <= 512 else max(count//10, 1)
+		L = [random.getrandbits(bits) | (1 << (bits-1)) | 1 for _ in range(c)]
+		tp, Rp = timeit(itools.are_probable_primes, L)
+		tr, Rr = timeit(lambda L: [itools.rabin_miller(n,10) for n in L], L)
+		print("{0}\t{1}\t{2:.4f} s\t\t{3:.4f} s\t({4} primes, same : {5})".format(bits, c, tp, tr, sum(Rp), Rp==Rr))
+
+
+#former itools.exp_mod : restarts the chain of squarings for every chunk of the exponent
+def _exp_mod_legacy(a, n, p):
+	r1 = 1
+	i = 0
+	while i < n:
+		r = a
+		j = 1
+		while 2 * j <= n - i:
+			r = (r * r) % p
+			j = 2 * j
+		i = i + j
+		r1 = (r1 * r) % p
+	return r1
+
+
+def bench_exp_mod(sizes=(64, 128, 256, 512, 1024, 2048), count=20):
+	"""Modular exponentiation engines : builtin pow, :func:`itools.exp_mod` (sliding window),
+	:func:`itools.exp_mod_binary` (constant memory) and the former exp_mod.
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of the modulo and of the exponents.
+		- *count (int)*: number of exponentiations per size (fewer for the former exp_mod).
+	"""
+
+	print("\n==== a^e mod p, e and p of the same size ====")
+	print("bits\tpow\t\twindow\t\tbinary\t\tformer (per call)")
+	for bits in sizes:
+		L = [(random.getrandbits(bits), random.getrandbits(bits), random.getrandbits(bits) | (1 << (bits-1)) | 1) for _ in range(count)]
+		res = []
+		for f in (pow, itools.exp_mod, itools.exp_mod_binary):
+			t, R = timeit(lambda L: [f(a,e,p) for a,e,p in L], L)
+			res.append((t/count, R))
+		c = max(1, count * 64 // bits)
+		t, R = timeit(lambda L: [_exp_mod_legacy(a,e,p) for a,e,p in L[:c]], L)
+		res.append((t/c, R + res[0][1][c:]))
+		same = all(R == res[0][1] for t, R in res)
+		print("{0}\t{1:.6f} s\t{2:.6f} s\t{3:.6f} s\t{4:.6f} s\t(same : {5})".format(bits, res[0][0], res[1][0], res[2][0], res[3][0], same))
+
+
+def bench_multi_exp(sizes=(128, 512, 1024, 2048), count=20):
+	"""g^a*h^b mod p : :func:`itools.multi_exp` against two calls to :func:`itools.exp_mod`.
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of the modulo and of the exponents.
+		- *count (int)*: number of products per size.
+	"""
+
+	print("\n==== g^a*h^b mod p ====")
+	print("bits\tmulti_exp\t2 x exp_mod\t1 x exp_mod")
+	for bits in sizes:
+		L = [[random.getrandbits(bits) for _ in range(4)] + [random.getrandbits(bits) | (1 << (bits-1)) | 1] for _ in range(count)]
+		tm, Rm = timeit(lambda L: [itools.multi_exp([g,h],[a,b],p) for g,h,a,b,p in L], L)
+		te, Re = timeit(lambda L: [itools.exp_mod(g,a,p)*itools.exp_mod(h,b,p) % p for g,h,a,b,p in L], L)
+		t1, R1 = timeit(lambda L: [itools.exp_mod(g,a,p) for g,h,a,b,p in L], L)
+		print("{0}\t{1:.6f} s\t{2:.6f} s\t{3:.6f} s\t(same : {4})".format(bits, tm/count, te/count, t1/count, Rm==Re))
+
+
+#former itools.rand_prime : fresh random integers and k rounds of Rabin-Miller
+def _rand_prime_rm(a,b,k):
+	r = random.randint(a,b)
+	while(not itools.rabin_miller(r,k)):
+		r = random.randint(a,b)
+	return r
+
+
+def bench_rand_prime(sizes=(128, 256, 512, 1024), count=5, jobs=4):
+	"""Random primes : windowed sieve (:func:`itools.rand_prime`), with a pool, in bulk (:func:`itools.rand_primes`),
+	against the former rand_prime (k=10, up to 256 bits).
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of the primes.
+		- *count (int)*: number of primes per size.
+		- *jobs (int)*: number of processes of the pool.
+	"""
+
+	print("\n==== random primes (per prime) ====")
+	print("bits\tsieve\t\tsieve (pool)\tbulk (pool)\tformer")
+	for bits in sizes:
+		a, b = 2**(bits-1), 2**bits - 1
+		ts, R = timeit(lambda: [itools.rand_prime(a,b) for _ in range(count)])
+		tp, R = timeit(lambda: [itools.rand_prime(a,b,jobs=jobs) for _ in range(count)])
+		tb, R = timeit(itools.rand_primes, count*jobs, a, b, 1, 2, 0, jobs)
+		tr, R = timeit(lambda: [_rand_prime_rm(a,b,10) for _ in range(count)]) if bits <= 256 else (float("nan"), None)
+		print("{0}\t{1:.4f} s\t{2:.4f} s\t{3:.4f} s\t{4:.4f} s".format(bits, ts/count, tp/count, tb/(count*jobs), tr/count))
+
+
+#former itools.get_group : k = 2, 3, 4... and 10 rounds of Rabin-Miller on every k*n+1
+def _get_group_rm(n):
+	k = 2
+	p = k*n + 1
+	while(not itools.rabin_miller(p,10)):
+		k += 1
+		p = k*n + 1
+	return p
+
+
+def bench_groups(sizes=(256, 512, 1024), count=5, jobs=4):
+	"""Group generation : sieved Schnorr groups (:func:`itools.schnorr_group`) against the former get_group,
+	and safe primes (:func:`itools.safe_prime_group`) with and without a pool.
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of the prime seed q (and of the safe primes).
+		- *count (int)*: number of random prime seeds per size.
+		- *jobs (int)*: number of processes of the pool.
+	"""
+
+	print("\n==== p = k*q+1, smallest k ====")
+	print("bits\tsieve\t\tsieve (pool)\tformer")
+	for bits in sizes:
+		L = []
+		for _ in range(count):
+			q = random.getrandbits(bits) | (1 << (bits-1)) | 1
+			while(not itools.is_probable_prime(q)):
+				q += 2
+			L.append(q)
+		ts, Rs = timeit(lambda L: [itools.schnorr_group(q)[1] for q in L], L)
+		tp, Rp = timeit(lambda L: [itools.schnorr_group(q, None, jobs)[1] for q in L], L)
+		tr, Rr = timeit(lambda L: [_get_group_rm(q) for q in L], L)
+		print("{0}\t{1:.4f} s\t{2:.4f} s\t{3:.4f} s\t(same : {4})".format(bits, ts/count, tp/count, tr/count, Rs == Rp == Rr))
+	print("\n==== safe primes ====")
+	print("bits\tsieve\t\tsieve (pool)")
+	for bits in sizes:
+		ts, R = timeit(itools.safe_prime_group, bits)
+		tp, R = timeit(itools.safe_prime_group, bits, jobs)
+		print("{0}\t{1:.4f} s\t{2:.4f} s".format(bits, ts, tp))
+
+
+def bench_ecm(sizes=(40, 50, 60), count=3, jobs=4):
+	"""ECM (:func:`pyfacto.ecm`, B1 = 11000) on p*q, p of a few bits and q of 256 bits, with and without stage 2.
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of the small factor p.
+		- *count (int)*: number of integers per size.
+		- *jobs (int)*: number of processes.
+	"""
+
+	print("\n==== ECM, B1 = 11000, 1000 curves max ====")
+	print("bits\tstage 1+2\tstage 1+2 (pool)\tstage 1 only")
+	for bits in sizes:
+		L = [itools.rand_prime_bits(bits)*itools.rand_prime_bits(256) for _ in range(count)]
+		res = []
+		for B2, j in ((None, 1), (None, jobs), (0, 1)):
+			t, R = timeit(lambda L: [pyfacto.ecm(n, 11000, B2, 1000, j) for n in L], L)
+			res.append((t/count, sum(g != 0 for g in R)))
+		print("\t".join([str(bits)] + ["{0:.4f} s ({1}/{2})".format(t, ok, count) for t, ok in res]))
+
+
+def bench_siqs(sizes=(30, 40, 50), jobs=4):
+	"""SIQS (:func:`pyfacto.siqs`) on semiprimes with balanced factors, progress counters included.
+
+	Optional Args:
+		- *sizes (List)*: number of digits of n.
+		- *jobs (int)*: number of processes collecting relations.
+	"""
+
+	print("\n==== SIQS, balanced semiprimes ====")
+	print("digits\ttime\t\tpolynomials\tfull\tcycles\trel/s\t(pool)")
+	for digits in sizes:
+		bits = int(digits * 3.3219) // 2
+		n = itools.rand_prime_bits(bits)*itools.rand_prime_bits(bits+1)
+		for j in (1, jobs):
+			stats = {}
+			t, g = timeit(pyfacto.siqs, n, j, stats)
+			print("{0}\t{1:.4f} s\t{2}\t\t{3}\t{4}\t{5:.1f}\t{6}".format(len(str(n)), t, stats["polynomials"], stats["full"], stats["cycles"], stats["rate"], j > 1))
+
+
+def bench_gf2(sizes=(1000, 10000, 30000, 100000), weight=20, excess=100):
+	"""Nullspace over GF(2) (:func:`gf2.nullspace`) of random sparse matrices shaped like sieve relations :
+	column c is hit with a probability about 1/c, as small primes are.
+
+	Optional Args:
+		- *sizes (List)*: numbers of columns (the matrices have size + excess rows).
+		- *weight (int)*: number of entries drawn per row.
+		- *excess (int)*: rows - columns.
+	"""
+
+	print("\n==== nullspace of N x N sparse matrices ====")
+	print("N\tfiltering\telimination\tdense\t\tdense size\tmax RSS")
+	for N in sizes:
+		rows = [[int(N ** random.random()) - 1 for _ in range(weight)] for _ in range(N + excess)]
+		M = gf2.SparseMatrix(rows)
+		tf, r = timeit(lambda: (M.remove_singletons(), M.remove_cliques(64)))
+		te, r = timeit(M.eliminate)
+		size = len(M)
+		td, deps = timeit(M.dependencies)
+		ok = True
+		for d in deps[:4]:
+			s = set()
+			for i in d:
+				for c in rows[i]:
+					s ^= {c}
+			ok = ok and not s
+		rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+		print("{0}\t{1:.4f} s\t{2:.4f} s\t{3:.4f} s\t{4}\t\t{5} MB\t({6} dependencies, correct : {7})".format(N, tf, te, td, size, rss, len(deps), ok))
+
+
+def bench_index_calculus(sizes=((48, 36), (64, 48), (80, 64)), count=5, jobs=4):
+	"""Index calculus (:class:`pwndlp.IndexCalculus`) in Schnorr groups, against Pollard's rho (:func:`pwndlp.rho_pollard_dlp_adv`)
+	while q is small enough.
+
+	Optional Args:
+		- *sizes (List)*: pairs (bits of p, bits of q).
+		- *count (int)*: number of logs per group (the factor base logs are shared).
+		- *jobs (int)*: number of processes collecting relations.
+	"""
+
+	print("\n==== DLP in the subgroup of order q of Z/pZ* ====")
+	print("p\tq\trelations + algebra\tper log\t\trho (per log)")
+	for pb, qb in sizes:
+		g, p, q, k = itools.schnorr_group(itools.rand_prime_bits(qb), pb)
+		xs = [random.randrange(q) for _ in range(count)]
+		ti, IC = timeit(pwndlp.IndexCalculus, g, q, p, None, jobs)
+		tl, R = timeit(lambda: [IC.log(pow(g, x, p)) for x in xs])
+		if(qb <= 40):
+			tr, Rr = timeit(lambda: [pwndlp.rho_pollard_dlp_adv(g, pow(g, x, p), q, p, q, 20) for x in xs])
+		else:
+			tr = float("nan")
+		print("{0}\t{1}\t{2:.4f} s\t\t{3:.4f} s\t{4:.4f} s\t(correct : {5})".format(pb, qb, ti, tl/count, tr/count, R == xs))
+
+
+def bench_bsgs(sizes=(24, 32, 40), memories=(2**27, 2**20), count=5):
+	"""Baby-step giant-step (:class:`pwndlp.BSGSTable`) in subgroups of order q, one table per group and
+	for several memory budgets, against Pollard's rho (:func:`pwndlp.rho_pollard_dlp_adv`).
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of q (p has 128 bits).
+		- *memories (List)*: memory budgets of the table in bytes.
+		- *count (int)*: number of logs per table.
+	"""
+
+	print("\n==== DLP by BSGS in the subgroup of order q of Z/pZ* ====")
+	print("q\tmemory\tbaby steps\ttable\t\tper log\t\trho (per log)")
+	for bits in sizes:
+		g, p, q, k = itools.schnorr_group(itools.rand_prime_bits(bits), 128)
+		xs = [random.randrange(q) for _ in range(count)]
+		if(bits <= 32):
+			tr, Rr = timeit(lambda: [pwndlp.rho_pollard_dlp_adv(g, pow(g, x, p), q, p, q, 20) for x in xs])
+		else:
+			tr = float("nan")
+		for memory in memories:
+			tt, T = timeit(pwndlp.BSGSTable, g, q, p, memory)
+			tl, R = timeit(lambda: [T.log(pow(g, x, p)) for x in xs])
+			print("{0}\t2^{1}\t{2}\t\t{3:.4f} s\t{4:.4f} s\t{5:.4f} s\t(correct : {6})".format(bits, memory.bit_length()-1, T.m, tt, tl/count, tr/count, R == xs))
+
+
+def bench_kangaroo(sizes=(24, 32, 36), count=3, jobs=4):
+	"""Kangaroo method (:func:`pwndlp.kangaroo` and :func:`pwndlp.kangaroo_par`) for logs in an interval of 2^bits
+	in a subgroup of order 2^160 of Z/pZ*, p of 512 bits.
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of the interval.
+		- *count (int)*: number of logs per interval.
+		- *jobs (int)*: number of processes of the parallel version.
+	"""
+
+	print("\n==== DLP in an interval ====")
+	print("bits\tserial (per log)\tparallel (per log)")
+	g, p, q, k = itools.schnorr_group(itools.rand_prime_bits(160), 512)
+	for bits in sizes:
+		a = random.getrandbits(128)
+		xs = [a + random.getrandbits(bits) for _ in range(count)]
+		ts, R = timeit(lambda: [pwndlp.kangaroo(g, pow(g, x, p), a, a + 2**bits, p, q) for x in xs])
+		tp, Rp = timeit(lambda: [pwndlp.kangaroo_par(g, pow(g, x, p), a, a + 2**bits, p, q, jobs) for x in xs])
+		print("{0}\t{1:.4f} s\t\t{2:.4f} s\t\t(correct : {3})".format(bits, ts/count, tp/count, R == xs and Rp == xs))
+
+
+def bench_rho_par(sizes=(32, 40), jobs=(1, 2, 4, 8), count=10):
+	"""Parallel rho (:func:`pwndlp.rho_pollard_dlp_par`) with its shared store of distinguished points, in subgroups
+	of order q of Z/pZ* (p of 256 bits). The steps of the longest worker measure the parallel time :
+	they are divided by the number of workers (the wall time only is when there are as many cores).
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of q.
+		- *jobs (List)*: numbers of workers.
+		- *count (int)*: number of logs per size.
+	"""
+
+	print("\n==== Parallel rho, shared distinguished points ====")
+	print("q\tjobs\tsteps\t\tsteps per worker\tspeedup\t\ttime\t\tDP rate (expected / observed)")
+	for bits in sizes:
+		g, p, q, k = itools.schnorr_group(itools.rand_prime_bits(bits), 256)
+		xs = [random.randrange(q) for _ in range(count)]
+		base = None
+		for j in jobs:
+			steps, walk, t, ok, expected, observed = 0, 0, 0, True, 0, 0
+			for x in xs:
+				stats = {}
+				ok &= pwndlp.rho_pollard_dlp_par(g, pow(g, x, p), q, p, q, 20, j, False, stats) == x
+				steps += stats["steps"]
+				walk += stats["walk_steps"]
+				t += stats["time"]
+				expected += stats["dp_expected"]
+				observed += stats["dp_observed"]
+			base = base or walk
+			print("{0}\t{1}\t{2}\t\t{3}\t\t\t{4:.2f}\t\t{5:.4f} s\t{6:.2e} / {7:.2e}\t(correct : {8})".format(bits, j, steps//count, walk//count, base/walk, t/count, expected/count, observed/count, ok))
+
+
+def bench_walks(sizes=(24, 28), count=200, walks=(("adding", 20, 0), ("adding", 8, 0), ("mixed", 16, 4), ("mixed", 20, 4), ("pollard", 2, 1))):
+	"""Walks of Pollard's rho (:func:`pwndlp.rho_pollard_dlp_adv`) : iterations of Floyd's cycle finding until the collision,
+	over count random logs, in units of sqrt(q) (a random mapping needs about 1.03*sqrt(q)).
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of q (p has 128 bits).
+		- *count (int)*: number of logs per walk.
+		- *walks (List)*: triples (walk, partitions, squaring partitions), Pollard's walk has 2 and 1 whatever they are.
+	"""
+
+	print("\n==== Walks of Pollard's rho ====")
+	print("q\twalk\t\tk\tsquarings\titerations / sqrt(q)\ttime")
+	for bits in sizes:
+		g, p, q, k = itools.schnorr_group(itools.rand_prime_bits(bits), 128)
+		xs = [random.randrange(100, q) for _ in range(count)]
+		for walk, r, squarings in walks:
+			iterations, ok = 0, True
+			t0 = time.monotonic()
+			for x in xs:
+				stats = {}
+				ok &= pwndlp.rho_pollard_dlp_adv(g, pow(g, x, p), q, p, q, r, False, walk, squarings, stats) == x
+				iterations += stats["iterations"]
+			t = time.monotonic() - t0
+			print("{0}\t{1}\t\t{2}\t{3}\t\t{4:.3f}\t\t\t{5:.4f} s\t(correct : {6})".format(bits, walk, r, squarings, iterations/count/q**0.5, t/count, ok))
+
+
+def bench_tag_tracing(sizes=(256, 512, 1024, 2048), count=3):
+	"""Walks of the parallel rho (:func:`pwndlp.rho_pollard_dlp_par`, one worker) : k-adding walk (:class:`pwndlp.RhoWalk`)
+	against tag tracing (:class:`pwndlp.TagWalk`), in steps per second, in subgroups of order q (36 bits) of Z/pZ*.
+
+	Optional Args:
+		- *sizes (List)*: bit lengths of p.
+		- *count (int)*: number of logs per size and walk.
+	"""
+
+	print("\n==== Tag tracing ====")
+	print("p\tadding (steps/s)\ttag (steps/s)\tspeedup")
+	for bits in sizes:
+		g, p, q, k = itools.schnorr_group(itools.rand_prime_bits(36), bits)
+		xs = [random.randrange(100, q) for _ in range(count)]
+		rates = []
+		ok = True
+		for walk in ("adding", "tag"):
+			steps, t = 0, 0
+			for x in xs:
+				stats = {}
+				ok &= pwndlp.rho_pollard_dlp_par(g, pow(g, x, p), q, p, q, 16, 1, False, stats, None, 256, 2**28, walk) == x
+				steps += stats["steps"]
+				t += stats["time"]
+			rates.append(steps/t)
+		print("{0}\t{1:.0f}\t\t\t{2:.0f}\t\t{3:.2f}\t(correct : {4})".format(bits, rates[0], rates[1], rates[1]/rates[0], ok))
+
+
+BENCHMARKS = {
+	"primes" : bench_primes,
+	"primality" : bench_primality,
+	"exp_mod" : bench_exp_mod,
+	"multi_exp" : bench_multi_exp,
+	"groups" : bench_groups,
+	"rand_prime" : bench_rand_prime,
+	"ecm" : bench_ecm,
+	"siqs" : bench_siqs,
+	"gf2" : bench_gf2,
+	"index_calculus" : bench_index_calculus,
+	"bsgs" : bench_bsgs,
+	"kangaroo" : bench_kangaroo,
+	"rho_par" : bench_rho_par,
+	"walks" : bench_walks,
+	"tag_tracing" : bench_tag_tracing,
+}
+
+if __name__ == "__main__":
+	names = sys.argv[1:] or sorted(BENCHMARKS.keys())
+	for name in names:
+		BENCHMARKS[name]()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Amaury Behague <amaury.behague@gmail.com>
+#
+# This file is part of cryptoguru.
+#
+# cryptopwn is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "Amaury Behague"
+__copyright__ = "Copyright 2016, Amaury Behague"
+__license__ = "GPL"
+__version__ = "3"
+__email__ = "amaury.behague@gmail.com"
+__status__ = "Beta"
+
+"""
+.. module:: dpnet
+	:platform: Unix
+	:synopsis: Distinguished points collector over TCP, for parallel rho on many machines.
+
+.. moduleauthor:: Amaury Behague <amaury.behague@gmail.com>
+
+A :class:`DPServer` holds the problem and the store of distinguished points. Each node connects
+to it with :func:`work`, receives the walk definition (g, h, p, n, b, k, the seed of the steps and
+the kind of walk, see :class:`pwndlp.RhoWalk` and :class:`pwndlp.TagWalk`) and the mask of the
+distinguished points, runs its own walks and sends their distinguished points in batches. The first useful collision gives the log, the server then sends
+a stop to every node.
+
+Every message is a JSON object preceded by its length (4 bytes, big endian) :
+
+	- server -> node : {"type": "walk", "g", "h", "p", "n", "b", "k", "seed", "mask", "walk"} on connection,
+	- node -> server : {"type": "points", "points": [[x, gx, hx], ...], "steps": steps of the node},
+	- server -> node : {"type": "stop", "log": x}.
+
+On one host : python dpnet.py serve g h p n 5555, then python dpnet.py work localhost 5555 4 in as many shells.
+"""
+
+import json, pwndlp, random, select, selectors, socket, struct, sys, time
+from multiprocessing import Process, Queue
+from queue import Empty
+
+
+def send_message(sock, message):
+	"""Sends a message (a JSON object) preceded by its length.
+
+	Args:
+		- *sock (socket)*: a connected socket
+		- *message (dict)*: the message
+	"""
+
+	data = json.dumps(message).encode()
+	sock.sendall(struct.pack(">I", len(data)) + data)
+
+#reads exactly size bytes, None if the connection was closed before
+def _recv_exactly(sock, size):
+	data = b""
+	while(len(data) < size):
+		chunk = sock.recv(size - len(data))
+		if(not chunk):
+			return None
+		data += chunk
+	return data
+
+
+def recv_message(sock):
+	"""Receives a message sent by :func:`send_message`.
+
+	Args:
+		- *sock (socket)*: a connected socket
+
+	Returns:
+		- *(dict)*: the message, None if the connection was closed.
+	"""
+
+	header = _recv_exactly(sock, 4)
+	if(header is None):
+		return None
+	data = _recv_exactly(sock, struct.unpack(">I", header)[0])
+	if(data is None):
+		return None
+	return json.loads(data.decode())
+
+#splits the complete messages at the start of buffer (a bytearray), removes them from it.
+#Raises ValueError if a frame isn't a JSON object.
+def _split_messages(buffer):
+	messages = []
+	while(len(buffer) >= 4):
+		size = struct.unpack(">I", bytes(buffer[:4]))[0]
+		if(len(buffer) < 4 + size):
+			break
+		message = json.loads(bytes(buffer[4:4+size]).decode())
+		if(not isinstance(message, dict)):
+			raise ValueError("not a message : "+str(message)[:32])
+		messages.append(message)
+		del buffer[:4+size]
+	return messages
+
+
+class DPServer(object):
+	"""Collector of the distinguished points of the nodes, for the DLP h = g^x in the subgroup of prime order p of Z/nZ*.
+
+	Args:
+		- *g (int)*: a generator
+		- *h (int)*: an integer in <g>
+		- *p (int)*: the order of <g>, must be prime
+		- *n (int)*: the modulo
+
+	Optional args:
+		- *b (int)*: exponent bound of the steps (p if omitted).
+		- *k (int)*: number of partitions of the walk.
+		- *walks (int)*: expected number of walks over all the nodes, sets the mask of the distinguished points.
+		- *memory (int)*: memory budget of the distinguished points in bytes, see :func:`pwndlp.dp_mask`.
+		- *host (str)*: address to listen on ("" : all the interfaces).
+		- *port (int)*: port to listen on (0 : any free port, see :attr:`address`).
+		- *seed (int)*: seed of the steps of the walk (random if omitted).
+		- *walk (str)*: "adding" or "tag", see :func:`pwndlp.rho_pollard_dlp_par`.
+		- *verbose (bool)*: set to True if you want a display.
+	"""
+
+	def __init__(self, g, h, p, n, b=None, k=20, walks=64, memory=2**28, host="", port=0, seed=None, walk="adding", verbose=False):
+		if(seed is None):
+			seed = random.getrandbits(64)
+		mask = pwndlp.dp_mask(p, n, walks, memory)
+		self.walk = {"type": "walk", "g": g, "h": h % n, "p": p, "n": n, "b": b or p, "k": k, "seed": seed, "mask": mask, "walk": walk}
+		self.store = pwndlp.DPStore(p)
+		self.steps = {}
+		self.verbose = verbose
+		self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self.sock.bind((host, port))
+		self.sock.listen(64)
+		self.address = self.sock.getsockname()
+
+	#handles one message of a node, returns the log if it's found
+	def _handle(self, conn, message):
+		if(message.get("type") != "points"):
+			return None
+		self.steps[conn] = message.get("steps", 0)
+		for x, gx, hx in message["points"]:
+			y = self.store.add(x, gx, hx)
+			if(y is not None):
+				return y
+		return None
+
+	def serve(self):
+		"""Collects the distinguished points until a collision gives the log, then stops the nodes.
+
+		Returns:
+			- *(int)*: x such that [x]g = h mod n
+		"""
+
+		sel = selectors.DefaultSelector()
+		sel.register(self.sock, selectors.EVENT_READ)
+		buffers = {}
+		x = None
+		t0 = time.monotonic()
+		if(self.verbose): print("dpnet : listening on",self.address,", distinguished points : x &",self.walk["mask"],"== 0")
+		while(x is None):
+			for key, events in sel.select(1):
+				if(key.fileobj is self.sock):
+					conn, address = self.sock.accept()
+					if(self.verbose): print("dpnet : node",address)
+					send_message(conn, self.walk)
+					sel.register(conn, selectors.EVENT_READ)
+					buffers[conn] = bytearray()
+					continue
+				conn = key.fileobj
+				#a node that fails (reset connection, bad frame) is dropped like a closed one
+				try:
+					data = conn.recv(1 << 16)
+					buffers[conn] += data
+					for message in _split_messages(buffers[conn]):
+						x = self._handle(conn, message)
+						if(x is not None):
+							break
+					lost = not data
+				except (OSError, ValueError, TypeError, KeyError):
+					lost = True
+				if(x is not None):
+					break
+				if(lost):
+					if(self.verbose): print("dpnet : node lost")
+					sel.unregister(conn)
+					conn.close()
+					del buffers[conn]
+		for conn in buffers:
+			try:
+				send_message(conn, {"type": "stop", "log": x})
+			except OSError:
+				pass
+			conn.close()
+		sel.close()
+		self.sock.close()
+		if(self.verbose): print("dpnet :\n[",x,"]",self.walk["g"],"=",self.walk["h"],"(",len(self.store),"distinguished points,",sum(self.steps.values()),"steps,",time.monotonic()-t0,"s )")
+		return x
+
+
+def work(host, port, jobs=8, batch=64, period=1.0, verbose=False):
+	"""Runs the walks of one node, until the server stops them.
+
+	Args:
+		- *host (str)*: address of the :class:`DPServer`
+		- *port (int)*: its port
+
+	Optional args:
+		- *jobs (int)*: number of walks (processes) of this node.
+		- *batch (int)*: number of distinguished points sent at once.
+		- *period (float)*: the points are sent at least every period seconds.
+		- *verbose (bool)*: set to True if you want a display.
+
+	Returns:
+		- *(int)*: the log found by the server, None if it closed the connection without it.
+	"""
+
+	sock = socket.create_connection((host, port))
+	walk = recv_message(sock)
+	if(walk is None):
+		sock.close()
+		return None
+	Walk, sub = pwndlp._RHO_WALKS[walk.get("walk", "adding")]
+	W = Walk(walk["g"], walk["h"], walk["p"], walk["n"], walk["b"], walk["k"], walk["seed"])
+	mask = walk["mask"]
+	if(verbose): print("dpnet : walking with",jobs,"processes, distinguished points : x &",mask,"== 0")
+
+	def core(worker, seed, output_queue): sub(W, mask, seed, worker, output_queue)
+	queue = Queue()
+	procs = []
+	for j in range(jobs):
+		procs.append(Process(target=core, args=(j, random.getrandbits(64), queue)))
+	for proc in procs:
+		proc.start()
+	walked = [0]*jobs
+	points = []
+	last = time.monotonic()
+	message = {}
+	while(message is not None and message.get("type") != "stop"):
+		try:
+			worker, s, x, gx, hx = queue.get(timeout=period)
+			walked[worker] = s
+			points.append([x, gx, hx])
+		except Empty:
+			pass
+		try:
+			if(len(points) >= batch or time.monotonic() - last >= period):
+				send_message(sock, {"type": "points", "points": points, "steps": sum(walked)})
+				points = []
+				last = time.monotonic()
+			#the stop sent by the server
+			if(select.select([sock], [], [], 0)[0]):
+				message = recv_message(sock)
+		except OSError:
+			message = None
+	for proc in procs:
+		proc.terminate()
+	sock.close()
+	x = None if(message is None) else message["log"]
+	if(verbose): print("dpnet :",sum(walked),"steps, log",x)
+	return x
+
+#import itools
+#g,p,q,k = itools.schnorr_group(itools.rand_prime_bits(48), 256)
+#S = DPServer(g, itools.exp_mod(g, random.randrange(q), p), q, p, port=5555, verbose=True)
+#nodes = [Process(target=work, args=("localhost", 5555, 2)) for _ in range(4)]
+#for node in nodes: node.start()
+#S.serve()
+
+
+if __name__ == "__main__":
+	if(len(sys.argv) >= 6 and sys.argv[1] == "serve"):
+		args = [int(a) for a in sys.argv[2:7]] + [5555]
+		DPServer(args[0], args[1], args[2], args[3], port=args[4], verbose=True).serve()
+	elif(len(sys.argv) >= 4 and sys.argv[1] == "work"):
+		work(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]) if len(sys.argv) > 4 else 8, verbose=True)
+	else:
+		print("usage : dpnet.py serve g h p n [port] | dpnet.py work host port [jobs]")
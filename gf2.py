@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Amaury Behague <amaury.behague@gmail.com>
+#
+# This file is part of cryptoguru.
+#
+# cryptopwn is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "Amaury Behague"
+__copyright__ = "Copyright 2016, Amaury Behague"
+__license__ = "GPL"
+__version__ = "3"
+__email__ = "amaury.behague@gmail.com"
+__status__ = "Beta"
+
+"""
+.. module:: gf2
+	:platform: Unix
+	:synopsis: Sparse linear algebra over GF(2), for the combine-of-congruences methods.
+
+.. moduleauthor:: Amaury Behague <amaury.behague@gmail.com>
+
+The rows are relations and the columns primes : a dependency is a set of rows whose sum is zero,
+i.e. whose product is a square. Rows are stored as sets of columns while the matrix is sparse,
+then as integers (bitsets) for the dense elimination of what remains.
+"""
+
+
+def dense_dependencies(rows, limit=0):
+	"""Gaussian elimination over GF(2) of dense rows.
+
+	Args:
+		- *rows (List)*: the rows, as integers (bit c set <=> column c)
+
+	Optional Args:
+		- *limit (int)*: stop after this number of dependencies (0 : all of them).
+
+	Returns:
+		- *(List)*: the dependencies, as integers (bit i set <=> rows[i] is in the sum).
+
+	Each row is reduced by the pivots of the previous ones (one XOR of two integers per step),
+	the combination of rows is carried along in a second integer.
+	"""
+
+	pivots = {}
+	deps = []
+	for i, r in enumerate(rows):
+		h = 1 << i
+		while(r):
+			c = r.bit_length() - 1
+			if(c not in pivots):
+				pivots[c] = (r, h)
+				break
+			pr, ph = pivots[c]
+			r ^= pr
+			h ^= ph
+		if(r == 0):
+			deps.append(h)
+			if(len(deps) == limit):
+				break
+	return deps
+
+
+class SparseMatrix:
+	"""Sparse matrix over GF(2), reduced by filtering and structured Gaussian elimination.
+
+	Args:
+		- *rows (List)*: the rows, as iterables of column indices (a column repeated twice cancels).
+
+	Each elimination is recorded (the pivots added to every row), so the dependencies found
+	on the reduced matrix are mapped back to the original rows.
+	"""
+
+	def __init__(self, rows):
+		self.rows = {}
+		self.heavy = {}
+		self.adds = {}
+		self.pivots = []
+		self.cols = {}
+		self.heavy_cols = {}
+		for i, r in enumerate(rows):
+			s = set()
+			for c in r:
+				s ^= {c}
+			self.rows[i] = s
+			self.heavy[i] = 0
+			for c in s:
+				self.cols.setdefault(c, set()).add(i)
+
+	def __len__(self):
+		return len(self.rows)
+
+	def excess(self):
+		"""Returns the number of rows minus the number of columns."""
+		return len(self.rows) - len(self.cols) - len(self.heavy_cols)
+
+	def weight(self):
+		"""Returns the number of non-zero entries of the light columns."""
+		return sum(len(r) for r in self.rows.values())
+
+	#deletes row i, returns its light columns
+	def _delete(self, i):
+		cols = self.rows.pop(i)
+		for c in cols:
+			rows = self.cols[c]
+			rows.discard(i)
+			if(not rows):
+				del self.cols[c]
+		del self.heavy[i]
+		return cols
+
+	def remove_singletons(self, todo=None):
+		"""Deletes the rows having a column of weight 1 (they can't be part of a dependency), until there are none.
+
+		Optional Args:
+			- *todo (List)*: the columns to look at first (all of them if omitted).
+
+		Returns:
+			- *(int)*: the number of deleted rows.
+		"""
+
+		deleted = 0
+		if(todo is None):
+			todo = [c for c, rows in self.cols.items() if len(rows) == 1]
+		while(todo):
+			c = todo.pop()
+			if(c in self.cols and len(self.cols[c]) == 1):
+				cols = self._delete(next(iter(self.cols[c])))
+				deleted += 1
+				todo += [d for d in cols if d in self.cols and len(self.cols[d]) == 1]
+		return deleted
+
+	def remove_cliques(self, excess):
+		"""Deletes the largest cliques (rows linked by columns of weight 2) while the excess is larger than wanted.
+
+		Args:
+			- *excess (int)*: the excess to keep
+
+		Returns:
+			- *(int)*: the number of deleted rows.
+
+		Deleting one row of a clique makes singletons of its weight 2 columns, so the whole clique goes.
+		"""
+
+		deleted = 0
+		while(self.excess() > excess):
+			parent = {}
+			def find(i):
+				while(parent.get(i, i) != i):
+					parent[i] = parent.get(parent[i], parent[i])
+					i = parent[i]
+				return i
+			for c, rows in self.cols.items():
+				if(len(rows) == 2):
+					a, b = rows
+					ra, rb = find(a), find(b)
+					if(ra != rb):
+						parent[ra] = rb
+			cliques = {}
+			for i in self.rows:
+				cliques.setdefault(find(i), []).append(i)
+			cliques = sorted(cliques.values(), key=len, reverse=True)
+			target = self.excess() - excess
+			removed = 0
+			for clique in cliques:
+				if(removed >= target):
+					break
+				#the excess decreases by about one per clique
+				cols = set()
+				for i in clique:
+					if(i in self.rows):
+						cols |= self._delete(i)
+						deleted += 1
+				removed += 1
+				deleted += self.remove_singletons(list(cols))
+			if(removed == 0):
+				break
+		return deleted
+
+	def _make_heavy(self, cols):
+		for c in cols:
+			bit = 1 << len(self.heavy_cols)
+			self.heavy_cols[c] = bit
+			for i in self.cols.pop(c):
+				self.rows[i].discard(c)
+				self.heavy[i] |= bit
+
+	def eliminate(self, step=0.01):
+		"""Structured Gaussian elimination : eliminates all the light columns.
+
+		Optional Args:
+			- *step (float)*: fraction of the light columns declared heavy when no pivot is left.
+
+		Returns:
+			- *(int)*: the number of eliminated columns.
+
+		A row with a single light column c is a pivot : it is added to the other rows of c, then deleted
+		with c. Light singletons are deleted with their row. When no pivot is left, the heaviest light
+		columns become heavy : the heavy part of each row is an integer (bitset), so adding a pivot costs one XOR.
+		"""
+
+		eliminated = 0
+		while(self.cols):
+			pivots = [i for i, r in self.rows.items() if len(r) == 1]
+			singletons = [c for c, rows in self.cols.items() if len(rows) == 1]
+			if(not pivots and not singletons):
+				k = max(1, int(step*len(self.cols)))
+				self._make_heavy(sorted(self.cols, key=lambda c: len(self.cols[c]))[-k:])
+				continue
+			for c in singletons:
+				if(c in self.cols and len(self.cols[c]) == 1):
+					self._delete(next(iter(self.cols[c])))
+			for p in pivots:
+				if(p not in self.rows or len(self.rows[p]) != 1):
+					continue
+				c = next(iter(self.rows[p]))
+				P = self.heavy[p]
+				for i in self.cols[c]:
+					if(i != p):
+						self.rows[i].discard(c)
+						self.heavy[i] ^= P
+						self.adds.setdefault(i, []).append(p)
+				self.cols[c] = {p}
+				self._delete(p)
+				self.pivots.append(p)
+				eliminated += 1
+		return eliminated
+
+	def dependencies(self, limit=64):
+		"""Dense elimination of the remaining matrix.
+
+		Optional Args:
+			- *limit (int)*: the maximum number of dependencies (0 : all of them).
+
+		Returns:
+			- *(List)*: the dependencies, as sorted lists of original row indices.
+		"""
+
+		self._make_heavy(list(self.cols))
+		keys = list(self.rows)
+		dense = dense_dependencies([self.heavy[i] for i in keys], limit)
+		#mark[i] : bit d set <=> original row i is in the dependency d
+		mark = {}
+		for d, h in enumerate(dense):
+			for j, bit in enumerate(reversed(bin(h)[2:])):
+				if(bit == '1'):
+					mark[keys[j]] = mark.get(keys[j], 0) ^ (1 << d)
+		#the pivots added to a row were eliminated before it : latest first
+		for i in keys + self.pivots[::-1]:
+			m = mark.get(i, 0)
+			if(m):
+				for p in self.adds.get(i, ()):
+					mark[p] = mark.get(p, 0) ^ m
+		deps = [[] for h in dense]
+		for i in sorted(mark):
+			m = mark[i]
+			for d in range(len(dense)):
+				if(m >> d & 1):
+					deps[d].append(i)
+		return [dep for dep in deps if dep]
+
+
+def nullspace(rows, excess=64, limit=64, step=0.01, verbose=False):
+	"""Dependencies between the rows of a sparse matrix over GF(2).
+
+	Args:
+		- *rows (List)*: the rows, as iterables of column indices (a column repeated twice cancels).
+
+	Optional Args:
+		- *excess (int)*: the excess (rows - columns) kept by the clique removal.
+		- *limit (int)*: the maximum number of dependencies (0 : all of them).
+		- *step (float)*: see :meth:`SparseMatrix.eliminate`.
+		- *verbose (bool)*: set to True if you want a display.
+
+	Returns:
+		- *(List)*: the dependencies, as sorted lists of row indices.
+
+	Singletons, then cliques are removed, structured Gaussian elimination gets rid of the light columns
+	and the heavy ones are solved by dense elimination on integer rows. Until the dense step, memory
+	is proportional to the number of non-zero entries.
+	"""
+
+	M = SparseMatrix(rows)
+	if(verbose): print("gf2 :",len(M),"x",len(M.cols),", weight",M.weight())
+	M.remove_singletons()
+	M.remove_cliques(excess)
+	if(verbose): print("gf2 : after filtering",len(M),"x",len(M.cols),", weight",M.weight())
+	M.eliminate(step)
+	if(verbose): print("gf2 : dense matrix",len(M),"x",len(M.heavy_cols))
+	return M.dependencies(limit)
+
+#rows = [[random.randrange(1000) for _ in range(10)] for _ in range(1100)]
+#deps = nullspace(rows, verbose=True)
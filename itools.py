@@ -34,7 +34,10 @@ __status__ = "Beta"
 .. moduleauthor:: Amaury Behague <amaury.behague@gmail.com>
 """
 
-import random
+import math, mmap, os, pickle, random, shutil, struct, tempfile
+from array import array
+from itertools import compress
+from multiprocessing import Pool
 random.seed()
 
 
@@ -130,6 +133,48 @@ def inversion_modulaire(a, p):
 
 
 
+def batch_inverse(values, n):
+	"""Inverts many integers modulo the same n with Montgomery's trick.
+	
+	Args:
+		- *values (List)*: a list of integers
+		- *n (int)*: the modulo
+		
+	Returns:
+		- *(int,List)*: (1, [1/values[i] mod n]) if every value is invertible,
+						(d, None) otherwise, where d = gcd(values[i],n) > 1 for some i.
+						A proper factor of n is returned whenever one of the gcds is.
+	
+	One extended Euclide on the product of the values, plus 3(k-1) multiplications.
+	"""
+	
+	k = len(values)
+	if(n == 1):
+		return 1, [0]*k
+	prefix = []
+	acc = 1
+	for v in values:
+		acc = (acc * v) % n
+		prefix.append(acc)
+	if(k == 0):
+		return 1, []
+	if(math.gcd(acc, n) != 1):
+		for v in values:
+			g = math.gcd(v, n)
+			if(1 < g < n):
+				return g, None
+		return n, None
+	inv = inversion_modulaire(acc, n)
+	res = [0]*k
+	for i in range(k-1, 0, -1):
+		res[i] = (inv * prefix[i-1]) % n
+		inv = (inv * values[i]) % n
+	res[0] = inv
+	return 1, res
+
+#print(batch_inverse([2,3,4],11), batch_inverse([2,3,4],15))
+
+
 #reconstruit modulo N (produit des ni) x = ai mod ni où les La est la liste des ai et Ln celle des ni.
 #pré-requis : La et Ln de même taille
 def crt(La, Ln, N=0):
@@ -149,33 +194,379 @@ def crt(La, Ln, N=0):
 	For all i, the following statement should be true :
 		La[i] < Ln[i]
 	
+	Use a :class:`CRTContext` to reconstruct many lists with the same moduli.
 	"""
 	
-	#if N is omitted
-	if(N==0):
-		N = 1
-		for ni in Ln :
-			N *= ni
-	x = 0	
-	for i in range(len(Ln)):
-		p = N // Ln[i]
-		v = inversion_modulaire(p, Ln[i])
-		x = (x + La[i]*v*p) % N
+	x = CRTContext(Ln).reconstruct(La)
+	if(N != 0):
+		x %= N
 	return x
 	
 #print(crt([2,3,2],[3,5,7],105))
 
 
-def ind_euler(n):
+#products of consecutive pairs of a list
+def _pair_products(level):
+	return [level[i] * level[i+1] if i+1 < len(level) else level[i] for i in range(0, len(level), 2)]
+
+#rems[i//2] mod level[i] (or level[i]^2) for each element of a chunk of a tree level
+def _pair_remainders(args):
+	rems, level, square = args
+	if(square):
+		return [rems[i//2] % (level[i] * level[i]) for i in range(len(level))]
+	return [rems[i//2] % level[i] for i in range(len(level))]
+
+#splits a tree level into chunks of even size (pairs are never cut)
+def _even_chunks(level, n):
+	size = max(2, -(-len(level) // n))
+	size += size % 2
+	return [(i, level[i:i+size]) for i in range(0, len(level), size)]
+
+
+class ProductTree(object):
+	"""Product tree of a list of integers.
+	
+	Args:
+		- *L (List)*: a list of integers
+		
+	Optional args:
+		- *pool (multiprocessing.Pool)*: if given, each level is computed in parallel.
+		- *spill (str)*: a directory. If given, the levels are written in a private subdirectory of it
+						instead of being kept in memory, deleted by :meth:`close` or when the tree is dropped.
+	
+	Level 0 is L, level i+1 holds the products of the consecutive pairs of level i, the last level is [root].
+	"""
+	
+	def __init__(self, L, pool=None, spill=None):
+		self.spill = spill
+		#one subdirectory per tree : several trees can share spill
+		self._dir = tempfile.mkdtemp(prefix="ptree", dir=spill) if(spill is not None) else None
+		self.sizes = []
+		self._levels = []
+		self._jobs = len(pool._pool) if pool is not None else 1
+		level = list(L)
+		self._store(level)
+		while(len(level) > 1):
+			if(pool is None):
+				level = _pair_products(level)
+			else:
+				level = [x for r in pool.map(_pair_products, [c for i, c in _even_chunks(level, 4*self._jobs)]) for x in r]
+			self._store(level)
+		self.root = level[0] if level else 1
+		
+	def _store(self, level):
+		if(self.spill is None):
+			self._levels.append(level)
+		else:
+			path = os.path.join(self._dir, "{0}.pkl".format(len(self.sizes)))
+			with open(path, "wb") as f:
+				pickle.dump(level, f, pickle.HIGHEST_PROTOCOL)
+			self._levels.append(path)
+		self.sizes.append(len(level))
+		
+	def __len__(self):
+		return len(self.sizes)
+		
+	def level(self, i):
+		"""Returns the i-th level of the tree (read from disk if spilled)."""
+		if(self.spill is None):
+			return self._levels[i]
+		with open(self._levels[i], "rb") as f:
+			return pickle.load(f)
+			
+	def close(self):
+		"""Deletes the spilled levels."""
+		if(self._dir is not None):
+			shutil.rmtree(self._dir, ignore_errors=True)
+			self._dir = None
+		self._levels = []
+		
+	def __del__(self):
+		#_dir is missing if __init__ failed before setting it
+		if(getattr(self, "_dir", None) is not None):
+			self.close()
+
+
+def remainder_tree(tree, x, square=False, pool=None):
+	"""Reduces an integer modulo every leaf of a product tree.
+	
+	Args:
+		- *tree (ProductTree)*: the product tree of some list L
+		- *x (int)*: an integer
+		
+	Optional args:
+		- *square (bool)*: set to True to reduce modulo the squares of the leaves.
+		- *pool (multiprocessing.Pool)*: if given, each level is computed in parallel.
+		
+	Returns:
+		- *(List)*: the list of the x mod L[i] (x mod L[i]^2 if square is True).
+	
+	Goes down the tree, reducing the remainder of each node modulo its children,
+	which is much cheaper than len(L) reductions of x.
+	"""
+	
+	if(tree.sizes[0] == 0):
+		return []
+	#x plays the role of the root's parent
+	rems = [x]
+	for i in range(len(tree)-1, -1, -1):
+		level = tree.level(i)
+		if(pool is None):
+			rems = _pair_remainders((rems, level, square))
+		else:
+			args = [(rems[j//2 : (j+len(c)+1)//2], c, square) for j, c in _even_chunks(level, 4*tree._jobs)]
+			rems = [r for res in pool.map(_pair_remainders, args) for r in res]
+	return rems
+
+
+def smooth_parts(L, P, tree=None):
+	"""Bernstein's batch smoothness test.
+
+	Args:
+		- *L (List)*: a list of positive integers
+		- *P (int)*: the product of the primes of a factor base
+
+	Optional args:
+		- *tree (ProductTree)*: the product tree of L, if already computed.
+
+	Returns:
+		- *(List)*: the largest divisor of L[i] whose primes all divide P. L[i] is smooth iff it is returned.
+
+	P is reduced modulo every L[i] with a remainder tree, then (P mod x)^(2^e) mod x, 2^e >= log2(x),
+	holds every prime of P at a power high enough : its gcd with x is the smooth part.
+	"""
+
+	if(tree is None):
+		tree = ProductTree(L)
+	parts = []
+	for x, r in zip(L, remainder_tree(tree, P)):
+		e = max(1, (x.bit_length()-1).bit_length())
+		parts.append(math.gcd(pow(r, 1 << e, x), x) if x > 1 else x)
+	return parts
+
+
+def rational_reconstruction(z, n, s=None):
+	"""Writes z as a fraction of two small integers modulo n.
+
+	Args:
+		- *z (int)*: an integer
+		- *n (int)*: the modulo
+
+	Optional args:
+		- *s (int)*: isqrt(n), when many fractions are computed modulo the same n.
+
+	Returns:
+		- *(int,int)*: a,b with a = z*b mod n, |a| and b below sqrt(n) (b > 0).
 
-	phi = 0
-	for i in range(1, n):
-		pgcd, u, v = euclide_extended(i, n, False)
-		if pgcd == 1:
-			phi += 1
+	Extended Euclid on (n, z), stopped at the first remainder below sqrt(n).
+	"""
+
+	r0, r1 = n, z % n
+	t0, t1 = 0, 1
+	if(s is None):
+		s = isqrt(n)
+	while(r1 > s):
+		k = r0 // r1
+		r0, r1 = r1, r0 - k*r1
+		t0, t1 = t1, t0 - k*t1
+	if(t1 < 0):
+		return -r1, -t1
+	return r1, t1
+
+
+class CRTContext(object):
+	"""Precomputations of the Chinese Remainder Theorem for a fixed list of pairwise coprime moduli.
+	
+	Args:
+		- *Ln (List)*: a list of pairwise coprime integers
+		
+	Optional args:
+		- *garner (int)*: up to this number of moduli, Garner's algorithm is used. Above, a subproduct tree.
+	
+	Garner : x = v0 + v1*n0 + v2*n0*n1 + ..., with the inverses of n0*..*n(i-1) mod ni precomputed.
+	Subproduct tree : x = sum of (La[i]*ci mod ni)*N/ni with ci = 1/(N/ni) mod ni precomputed
+	(N/ni mod ni comes from a remainder tree), the sum is then evaluated up the tree in quasi-linear time.
+	"""
+	
+	def __init__(self, Ln, garner=16):
+		self.Ln = list(Ln)
+		self.garner = len(self.Ln) <= garner
+		if(self.garner):
+			self.prefix = []
+			self.coefs = []
+			P = 1
+			for ni in self.Ln:
+				self.prefix.append(P)
+				self.coefs.append(inversion_modulaire(P, ni) if ni > 1 else 0)
+				P *= ni
+			self.N = P
+		else:
+			self.tree = ProductTree(self.Ln)
+			self.N = self.tree.root
+			rems = remainder_tree(self.tree, self.N, True)
+			self.coefs = [inversion_modulaire(r // ni, ni) if ni > 1 else 0 for r, ni in zip(rems, self.Ln)]
+			
+	def reconstruct(self, La):
+		"""Reconstruction.
+		
+		Args:
+			- *La (List)*: a list of integers, which size must be len(Ln).
+			
+		Returns:
+			- *(int)*: the x in [0,N[ such that x = La[i] mod Ln[i] for all i.
+		"""
+		
+		if(self.garner):
+			x = 0
+			for ai, ni, P, c in zip(La, self.Ln, self.prefix, self.coefs):
+				x += (((ai - x) * c) % ni) * P
+			return x
+		t = [(ai * c) % ni for ai, ni, c in zip(La, self.Ln, self.coefs)]
+		for i in range(len(self.tree)-1):
+			level = self.tree.level(i)
+			t = [t[j]*level[j+1] + t[j+1]*level[j] if j+1 < len(t) else t[j] for j in range(0, len(t), 2)]
+		return t[0] % self.N if t else 0
+		
+	def reconstruct_many(self, LLa):
+		"""Batch reconstruction.
+		
+		Args:
+			- *LLa (List)*: a list of lists of residues, each one of size len(Ln).
+			
+		Returns:
+			- *(List)*: the list of the reconstructed integers.
+		"""
+		
+		return [self.reconstruct(La) for La in LLa]
+
+#ctx = CRTContext([3,5,7])
+#print(ctx.reconstruct_many([[2,3,2],[1,1,1]]))
+
+
+#factorisation of n, computed by pyfacto if not given
+def _factors(n, facteurs=None):
+	if(facteurs is not None):
+		return facteurs
+	if(n < 2):
+		return {}
+	import pyfacto #pyfacto imports itools
+	return pyfacto.easy_facto(n)
+
+
+def ind_euler(n, facteurs=None):
+	"""Euler's totient.
+	
+	Args:
+		- *n (int)*: a positive integer
+		
+	Optional args:
+		- *facteurs (dict)*: the factorisation of n {prime : exponent}, computed with pyfacto if omitted.
+		
+	Returns:
+		- *(int)*: phi(n), the number of integers in [1,n] coprime to n.
+	"""
+	
+	phi = 1
+	for p, e in _factors(n, facteurs).items():
+		phi *= (p-1) * p**(e-1)
 	return phi
 
 
+def carmichael(n, facteurs=None):
+	"""Carmichael's function.
+	
+	Args:
+		- *n (int)*: a positive integer
+		
+	Optional args:
+		- *facteurs (dict)*: the factorisation of n {prime : exponent}, computed with pyfacto if omitted.
+		
+	Returns:
+		- *(int)*: lambda(n), the exponent of (Z/nZ)*, i.e. the lcm of the orders of its elements.
+	"""
+	
+	lam = 1
+	for p, e in _factors(n, facteurs).items():
+		l = (p-1) * p**(e-1)
+		if(p == 2 and e >= 3):
+			l //= 2
+		lam = lam * l // math.gcd(lam, l)
+	return lam
+
+
+def multiplicative_order(a, n, facteurs=None):
+	"""Order of a in (Z/nZ)*.
+	
+	Args:
+		- *a (int)*: an integer coprime to n
+		- *n (int)*: the modulo
+		
+	Optional args:
+		- *facteurs (dict)*: the factorisation of n {prime : exponent}, computed with pyfacto if omitted.
+		
+	Returns:
+		- *(int)*: the smallest k > 0 such that a^k = 1 mod n, 0 if gcd(a,n) > 1.
+	
+	Starts from lambda(n) and removes its prime factors as long as a^k stays 1.
+	"""
+	
+	if(math.gcd(a, n) != 1):
+		return 0
+	if(n == 1):
+		return 1
+	return element_order(a, n, _factors(carmichael(n, _factors(n, facteurs))))
+
+
+def totient_table(N):
+	"""Euler's totient and Carmichael's function of every integer below a bound.
+	
+	Args:
+		- *N (int)*: the bound
+		
+	Returns:
+		- *(array,array)*: phi and lam, two arrays of size N such that phi[n] = phi(n) and lam[n] = lambda(n) (0 for n = 0).
+	
+	Linear sieve : every n is crossed out once, by its smallest prime factor.
+	The values are stored in compact arrays (array module), 4 bytes per entry below 2^32.
+	"""
+	
+	code = 'I' if N <= 2**32 else 'Q'
+	phi = array(code, bytes(4 if code == 'I' else 8)) * N
+	lam = array(code, phi)
+	lp = array(code, phi) #smallest prime factor
+	pw = array(code, phi) #largest power of lp[n] dividing n
+	primes = []
+	if(N > 1):
+		phi[1] = lam[1] = 1
+	for i in range(2, N):
+		if(lp[i] == 0):
+			lp[i] = pw[i] = i
+			phi[i] = i-1
+			primes.append(i)
+		li = lp[i]
+		for p in primes:
+			m = i*p
+			if(p > li or m >= N):
+				break
+			lp[m] = p
+			if(p == li):
+				pw[m] = pw[i]*p
+				phi[m] = phi[i]*p
+			else:
+				pw[m] = p
+				phi[m] = phi[i]*(p-1)
+	for i in range(2, N):
+		q = pw[i]
+		if(q == i):
+			lam[i] = phi[i]//2 if (lp[i] == 2 and i >= 8) else phi[i]
+		else:
+			a, b = lam[q], lam[i//q]
+			lam[i] = a * b // math.gcd(a, b)
+	return phi, lam
+
+#phi, lam = totient_table(1000000)
+
+
 def exp_mod(a, n, p):
 	"""An efficient function to compute a^n mod p.
 	
@@ -184,24 +575,210 @@ def exp_mod(a, n, p):
 		- *n (int)*: an integer
 		- *p (int)*: an integer > a
 		
+	Returns:
+		- *(int)*: a^n mod p (1 if n <= 0)
+	
+	Left-to-right sliding window exponentiation (see :func:`exp_mod_window`).
+	Up to 256-bit exponents, plain square-and-multiply (:func:`exp_mod_binary`) is faster in Python.
+	"""
+	
+	if(n <= 0):
+		return 1
+	if(n.bit_length() <= 256):
+		return exp_mod_binary(a, n, p)
+	return exp_mod_window(a, n, p)
+
+
+def exp_mod_binary(a, n, p):
+	"""Left-to-right square-and-multiply : a^n mod p in constant memory.
+	
+	Args:
+		- *a (int)*: an integer
+		- *n (int)*: a non-negative integer
+		- *p (int)*: the modulo
+		
 	Returns:
 		- *(int)*: a^n mod p
 	
-	Actually just a custom implementation of fastexp. Uses the binary decomposition of n.
+	Costs log2(n) squarings and one multiplication per bit set in n.
+	"""
+	
+	a %= p
+	r = 1
+	for bit in bin(n)[2:]:
+		r = (r * r) % p
+		if(bit == '1'):
+			r = (r * a) % p
+	return r % p
+
+
+def window_size(bits):
+	"""Best width of a sliding window for an exponent of a given size.
+	
+	Args:
+		- *bits (int)*: bit length of the exponent
+		
+	Returns:
+		- *(int)*: the width w minimizing 2^(w-1) (table) + bits/(w+1) (multiplications).
 	"""
+	
+	w = 1
+	while(2**w + bits/(w+2) < 2**(w-1) + bits/(w+1)):
+		w += 1
+	return w
+
+
+def exp_mod_window(a, n, p, w=None):
+	"""Left-to-right sliding window exponentiation : a^n mod p.
+	
+	Args:
+		- *a (int)*: an integer
+		- *n (int)*: a non-negative integer
+		- *p (int)*: the modulo
+		
+	Optional args:
+		- *w (int)*: window width, given by :func:`window_size` if omitted.
 		
-	r1 = 1
+	Returns:
+		- *(int)*: a^n mod p
+	
+	Precomputes the odd powers a, a^3, .., a^(2^w-1), then scans n from its most significant bit.
+	Windows start and end on a bit set, so there is about one multiplication every w+1 bits.
+	"""
+	
+	s = bin(n)[2:]
+	if(w is None):
+		w = window_size(len(s))
+	a %= p
+	table = [a]
+	a2 = (a * a) % p
+	for _ in range((1 << (w-1)) - 1):
+		table.append((table[-1] * a2) % p)
+	r = 1
 	i = 0
-	while i < n:
-		r = a
-		j = 1
-		while 2 * j <= n - i:
+	L = len(s)
+	while(i < L):
+		if(s[i] == '0'):
 			r = (r * r) % p
-			j = 2 * j
-		i = i + j
-		r1 = (r1 * r) % p
-	return r1
+			i += 1
+		else:
+			j = min(i + w, L)
+			while(s[j-1] == '0'):
+				j -= 1
+			if(r != 1):
+				for _ in range(j - i):
+					r = (r * r) % p
+			r = (r * table[int(s[i:j], 2) >> 1]) % p
+			i = j
+	return r % p
+	
+	
+def multi_exp(bases, exponents, p, w=None):
+	"""Simultaneous multi-exponentiation : computes the product of the bases[i]^exponents[i] mod p.
+	
+	Args:
+		- *bases (List)*: a list of integers
+		- *exponents (List)*: a list of non-negative integers, which size must be len(bases).
+		- *p (int)*: the modulo
+		
+	Optional args:
+		- *w (int)*: window width, given by :func:`window_size` if omitted.
+		
+	Returns:
+		- *(int)*: bases[0]^exponents[0] * bases[1]^exponents[1] * ... mod p
+	
+	Straus' interleaved method : the exponents are cut in windows of w bits, scanned together
+	from the most significant one, so the squarings are shared by all the bases.
+	A product g^a*h^b costs about one exponentiation instead of two.
+	"""
+	
+	bits = max([e.bit_length() for e in exponents] + [0])
+	if(bits == 0):
+		return 1 % p
+	if(w is None):
+		w = window_size(bits)
+	mask = (1 << w) - 1
+	tables = []
+	for a in bases:
+		row = [1, a % p]
+		for j in range(2, 1 << w):
+			row.append((row[-1] * row[1]) % p)
+		tables.append(row)
+	r = 1
+	for shift in range(w * ((bits-1) // w), -1, -w):
+		if(r != 1):
+			for _ in range(w):
+				r = (r * r) % p
+		for e, row in zip(exponents, tables):
+			d = (e >> shift) & mask
+			if(d):
+				r = (r * row[d]) % p
+	return r
+
+#print(multi_exp([2,3,5],[10,20,30],1000003) == (2**10 * 3**20 * 5**30) % 1000003)
+
+
+class FixedBase(object):
+	"""Fixed-base modular exponentiation : a^e mod p for many exponents e.
+	
+	Args:
+		- *a (int)*: the base
+		- *p (int)*: the modulo
+		- *bits (int)*: bit length of the largest exponent expected
+		
+	Optional args:
+		- *w (int)*: window width, chosen from bits if omitted.
+		- *order (int)*: order of a (or a multiple of it), exponents are then reduced modulo order.
+	
+	Precomputes table[i][j] = a^(j*2^(w*i)) mod p once (about bits*2^w/w multiplications),
+	then each call to :meth:`pow` only costs bits/w multiplications and no squaring.
+	"""
 	
+	def __init__(self, a, p, bits, w=None, order=None):
+		if(w is None):
+			w = 4 if bits <= 256 else 5
+		self.a = a
+		self.p = p
+		self.w = w
+		self.order = order
+		self.table = []
+		x = a % p
+		for i in range(max(-(-bits // w), 1)):
+			row = [1, x]
+			for j in range(2, 1 << w):
+				row.append((row[-1] * x) % p)
+			self.table.append(row)
+			x = (row[-1] * x) % p
+		#a^(2^(w*len(table))), used if an exponent overflows the table
+		self.top = x
+		
+	def pow(self, e):
+		"""Computes a^e mod p.
+		
+		Args:
+			- *e (int)*: a non-negative exponent (any exponent if order was given)
+			
+		Returns:
+			- *(int)*: a^e mod p
+		"""
+		
+		if(self.order is not None):
+			e %= self.order
+		p = self.p
+		w = self.w
+		mask = (1 << w) - 1
+		r = 1
+		for row in self.table:
+			if(e == 0):
+				return r % p
+			d = e & mask
+			if(d):
+				r = (r * row[d]) % p
+			e >>= w
+		if(e):
+			r = (r * exp_mod(self.top, e, p)) % p
+		return r % p
+		
 	
 def isqrt(n):
 	"""Integer Square Root.
@@ -300,88 +877,874 @@ def mersenne(p): #Mersenne numbers (not all primes)
 #rabin_miller(mersenne(107),10,True)
 
 
-def get_primes(a,b,k,verbose=False):
-	"""Computes the list of primes between two integers.
+def small_primes(n):
+	"""Computes the list of primes below n with a plain sieve of Eratosthenes.
+	
+	Args:
+		- *n (int)*: an integer
+		
+	Returns:
+		- *(List)*: the list of primes in [2,n[
+	
+	Only odd integers are stored in the sieve. Meant for small bounds (sieving primes, factor bases...).
+	"""
+	
+	if(n < 3):
+		return []
+	#sieve[i] <=> 2*i+1
+	sieve = bytearray([1]) * (n//2)
+	sieve[0] = 0
+	for i in range(1, (isqrt(n-1)-1)//2 + 1):
+		if(sieve[i]):
+			p = 2*i + 1
+			start = (p*p)//2
+			sieve[start::p] = bytes(len(range(start, n//2, p)))
+	return [2] + [2*i+1 for i in compress(range(n//2), sieve)]
+
+
+def iter_primes(a, b, segment=2**18):
+	"""Lazily generates the primes between two integers with a segmented sieve of Eratosthenes.
 	
 	Args:
 		- *a (int)*: an integer
 		- *b (int)*: an integer such as b > a
-		- *k (int)*: the number of repetitions Rabin-Miller primality test.
 		
 	Optional Args:
+		- *segment (int)*: number of odd integers sieved at once. Bounds the memory used.
+		
+	Yields:
+		- *(int)*: the primes in [a,b[, in increasing order.
+	
+	Only the sieving primes (up to sqrt(b)) are kept in memory, so b can be very large.
+	"""
+	
+	if(_prime_table is not None and b <= _prime_table.limit):
+		for p in _prime_table.iter_primes(a, b):
+			yield p
+		return
+	if(a <= 2 < b):
+		yield 2
+	lo = max(a, 3) | 1
+	if(lo >= b):
+		return
+	base = small_primes(isqrt(b-1) + 1)[1:]
+	while(lo < b):
+		size = min(segment, (b - lo + 1)//2)
+		sieve = _sieve_segment(lo, size, base)
+		for i in compress(range(size), sieve):
+			yield lo + 2*i
+		lo += 2*size
+
+
+#sieve[i] == 1 <=> lo+2*i is prime (lo odd, base : odd sieving primes up to sqrt(lo+2*size))
+def _sieve_segment(lo, size, base):
+	hi = lo + 2*size
+	sieve = bytearray([1]) * size
+	for p in base:
+		pp = p*p
+		if(pp >= hi):
+			break
+		if(pp >= lo):
+			start = (pp - lo)//2
+		else:
+			#first odd multiple of p >= lo
+			m = -(-lo // p) * p
+			if(m % 2 == 0):
+				m += p
+			start = (m - lo)//2
+		if(start < size):
+			sieve[start::p] = bytes(len(range(start, size, p)))
+	if(lo == 1):
+		sieve[0] = 0
+	return sieve
+
+
+#on-disk prime table : header, cumulated counts of odd primes per block, then one bit per odd integer
+_TABLE_MAGIC = b"CGPRIMES"
+_TABLE_HEADER = struct.Struct("<8sIIQQ") #magic, version, block size (bytes), limit, number of blocks
+#_BYTE_BITS[x] : positions of the bits set in the byte x
+_BYTE_BITS = [tuple(j for j in range(8) if (x >> j) & 1) for x in range(256)]
+
+def build_prime_table(path, limit=2**32, segment=2**22, block=4096, verbose=False):
+	"""Builds a bit-packed table of the primes below some bound and writes it to disk.
+	
+	Args:
+		- *path (str)*: the file to write
+		
+	Optional Args:
+		- *limit (int)*: the table contains the primes in [0,limit[
+		- *segment (int)*: number of odd integers sieved at once (multiple of 8*block).
+		- *block (int)*: number of bytes between two entries of the pi(x) index.
 		- *verbose (bool)*: set to True if you want a display.
 		
 	Returns:
-		- *(List)*: the list of pseudo-prime integers in [a,b[
+		- *(int)*: the number of primes in the table.
+	
+	Bit j of byte i is set iff 2*(8*i+j)+1 is prime, so 2**32 takes 256 MB.
+	The table is meant to be opened with :class:`PrimeTable`.
+	"""
+	
+	segment -= segment % (8*block)
+	nbits = limit//2
+	nbytes = -(-nbits // 8)
+	nblocks = -(-nbytes // block)
+	base = small_primes(isqrt(limit) + 1)[1:]
+	counts = [0]
+	total = 0
+	with open(path, "wb") as f:
+		f.write(_TABLE_HEADER.pack(_TABLE_MAGIC, 1, block, limit, nblocks))
+		f.write(bytes(8*(nblocks+1)))
+		done = 0
+		while(done < nbits):
+			size = min(segment, nbits - done)
+			sieve = _sieve_segment(2*done + 1, size, base)
+			sieve += bytes(-size % 8)
+			#packs sieve[8*i+j] into bit j of byte i
+			packed = 0
+			for j in range(8):
+				packed |= int.from_bytes(sieve[j::8], "little") << j
+			packed = packed.to_bytes(len(sieve)//8, "little")
+			for i in range(0, len(packed), block):
+				total += bin(int.from_bytes(packed[i:i+block], "little")).count("1")
+				counts.append(total)
+			f.write(packed)
+			done += size
+			if(verbose): print("build_prime_table :", 2*done, "/", limit)
+		f.seek(_TABLE_HEADER.size)
+		f.write(struct.pack("<{0}Q".format(nblocks+1), *counts))
+	if(verbose): print("build_prime_table :", total+1, "primes below", limit, "written to", path)
+	return total + (limit > 2)
+
+
+class PrimeTable(object):
+	"""Read-only view on a prime table written by :func:`build_prime_table`.
+	
+	Args:
+		- *path (str)*: the table file
 	
-	Why "pseudo-prime"? Because you can never be sure that they are prime with RM primality test.
+	The file is memory-mapped : every process opening it (or inheriting it through fork) shares
+	the same physical pages. Pickling a PrimeTable only sends its path.
 	"""
+	
+	def __init__(self, path):
+		self.path = path
+		self._file = open(path, "rb")
+		self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, version, self.block, self.limit, self.nblocks = _TABLE_HEADER.unpack_from(self._mm, 0)
+		if(magic != _TABLE_MAGIC or version != 1):
+			raise ValueError("{0} is not a prime table".format(path))
+		self._counts = _TABLE_HEADER.size
+		self._bits = self._counts + 8*(self.nblocks+1)
 		
-	primes = []
+	def __getstate__(self):
+		return self.path
+		
+	def __setstate__(self, path):
+		self.__init__(path)
+		
+	def close(self):
+		self._mm.close()
+		self._file.close()
+		
+	def _count(self, blk):
+		return struct.unpack_from("<Q", self._mm, self._counts + 8*blk)[0]
+		
+	def is_prime(self, n):
+		"""Returns True iff n is prime (n < limit)."""
+		if(n < 3 or n % 2 == 0):
+			return n == 2
+		m = n // 2
+		return (self._mm[self._bits + m//8] >> (m%8)) & 1 == 1
+		
+	def pi(self, x):
+		"""Prime-counting function.
+		
+		Args:
+			- *x (int)*: an integer < limit
+			
+		Returns:
+			- *(int)*: the number of primes <= x.
+		"""
+		
+		if(x < 2):
+			return 0
+		m = (x-1)//2 #odd integers 1,3,..,2m+1 <= x
+		byte = m//8
+		blk = byte // self.block
+		start = self._bits + blk*self.block
+		r = 1 + self._count(blk)
+		r += bin(int.from_bytes(self._mm[start:self._bits + byte], "little")).count("1")
+		r += bin(self._mm[self._bits + byte] & ((2 << (m%8)) - 1)).count("1")
+		return r
+		
+	def nth(self, i):
+		"""Index lookup.
+		
+		Args:
+			- *i (int)*: an index, 1 <= i <= pi(limit-1)
+			
+		Returns:
+			- *(int)*: the i-th prime (nth(1) = 2).
+		"""
+		
+		if(i == 1):
+			return 2
+		i -= 1 #rank among odd primes
+		lo, hi = 0, self.nblocks
+		#binary search of the last block such as count(blk) < i
+		while(hi - lo > 1):
+			mid = (lo + hi)//2
+			if(self._count(mid) < i):
+				lo = mid
+			else:
+				hi = mid
+		i -= self._count(lo)
+		offset = self._bits + lo*self.block
+		for byte in range(lo*self.block, (lo+1)*self.block):
+			bits = _BYTE_BITS[self._mm[offset]]
+			if(len(bits) >= i):
+				return 2*(8*byte + bits[i-1]) + 1
+			i -= len(bits)
+			offset += 1
+		raise IndexError("prime table index out of range")
+		
+	def iter_primes(self, a, b, chunk=2**16):
+		"""Generates the primes in [a,b[ (b <= limit), in increasing order."""
+		
+		if(a <= 2 < b):
+			yield 2
+		m0, m1 = max(a, 3)//2, b//2 #odd integers 2m+1 with m0 <= m < m1
+		byte = m0//8
+		while(8*byte < m1):
+			data = self._mm[self._bits + byte : self._bits + min(byte + chunk, -(-m1 // 8))]
+			for k in range(len(data)):
+				if(data[k]):
+					base = 8*(byte + k)
+					for j in _BYTE_BITS[data[k]]:
+						if(m0 <= base + j < m1):
+							yield 2*(base + j) + 1
+			byte += len(data)
+
+
+_prime_table = None
+
+def load_prime_table(path):
+	"""Opens a prime table and makes :func:`iter_primes` (hence :func:`get_primes`) use it
+	for every bound it covers.
+	
+	Args:
+		- *path (str)*: a file written by :func:`build_prime_table`, or None to stop using a table.
+		
+	Returns:
+		- *(PrimeTable)*: the table (None if path is None).
+	
+	Call it before starting worker processes : they will share the mapping.
+	"""
+	
+	global _prime_table
+	if(_prime_table is not None):
+		_prime_table.close()
+	_prime_table = None if path is None else PrimeTable(path)
+	return _prime_table
+
+#build_prime_table("primes32.bin", 2**32, verbose=True)
+#load_prime_table("primes32.bin")
+
+def get_primes(a,b,k=0,verbose=False):
+	"""Computes the list of primes between two integers.
+	
+	Args:
+		- *a (int)*: an integer
+		- *b (int)*: an integer such as b > a
+		
+	Optional Args:
+		- *k (int)*: ignored, kept for compatibility (used to be the number of Rabin-Miller rounds).
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(List)*: the list of primes in [a,b[
+	
+	Uses :func:`iter_primes`, so the result is exact. As before, 2 and 3 are included whenever a < 5.
+	"""
+	
 	if(a<5):
-		start = 5
-		primes = [2,3]
-	else:
-		start = a
-	for n in range(start,b):
-		#rabin_miller ne fait les k tours que si nécessaire
-		if(rabin_miller(n,k)):
-			primes.append(n)
-	if(verbose): print("get_primes : those numbers have", 100*(1-1/(2**k)), "% chances to be prime")
+		a = 2
+	primes = list(iter_primes(a,b))
+	if(verbose): print("get_primes :", len(primes), "primes in [", a, ",", b, "[")
 	return primes
 	
 #print(get_primes(10000,10100,20,True))
 		
-#génère un nombre premier entre a et b, testé avec k tours de Rabin-Miller
-def rand_prime(a,b,k,verbose=False):
+def jacobi(a, n):
+	"""Jacobi symbol.
+	
+	Args:
+		- *a (int)*: an integer
+		- *n (int)*: an odd positive integer
+		
+	Returns:
+		- *(int)*: (a/n), in {-1,0,1}
+	"""
+	
+	a %= n
+	r = 1
+	while(a != 0):
+		while(a % 2 == 0):
+			a //= 2
+			if(n % 8 in (3, 5)):
+				r = -r
+		a, n = n, a
+		if(a % 4 == 3 and n % 4 == 3):
+			r = -r
+		a %= n
+	return r if n == 1 else 0
+
+
+def sqrt_mod(a, p):
+	"""Square root modulo a prime (Tonelli-Shanks).
+
+	Args:
+		- *a (int)*: a quadratic residue mod p
+		- *p (int)*: a prime integer
+
+	Returns:
+		- *(int)*: r such that r*r = a mod p, 0 if a isn't a square mod p.
+	"""
+
+	a %= p
+	if(a == 0 or p == 2):
+		return a
+	if(jacobi(a, p) != 1):
+		return 0
+	if(p % 4 == 3):
+		return pow(a, (p+1)//4, p)
+	#p-1 = q*2^s
+	q, s = p-1, 0
+	while(q % 2 == 0):
+		q, s = q//2, s+1
+	z = 2
+	while(jacobi(z, p) != -1):
+		z += 1
+	c, r, t = pow(z, q, p), pow(a, (q+1)//2, p), pow(a, q, p)
+	while(t != 1):
+		i, t2 = 0, t
+		while(t2 != 1):
+			t2, i = t2*t2 % p, i+1
+		b = pow(c, 1 << (s-i-1), p)
+		c = b*b % p
+		r, t, s = r*b % p, t*c % p, i
+	return r
+
+
+_TRIAL_PRIMES = small_primes(1000)
+_TRIAL_SET = frozenset(_TRIAL_PRIMES)
+_PRIMORIAL = 1
+for _p in _TRIAL_PRIMES:
+	_PRIMORIAL *= _p
+#(B, bases) : the strong pseudoprime test to all these bases is deterministic below B
+_MR_BASES = [
+	(2047, (2,)),
+	(1373653, (2, 3)),
+	(25326001, (2, 3, 5)),
+	(3215031751, (2, 3, 5, 7)),
+	(2152302898747, (2, 3, 5, 7, 11)),
+	(3474749660383, (2, 3, 5, 7, 11, 13)),
+	(341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+	(3825123056546413051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+	(318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+	(3317044064679887385961981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+]
+
+#strong probable prime test to base a, n-1 = d*2^s
+def _strong_test(n, a, d, s):
+	x = pow(a, d, n)
+	if(x == 1 or x == n-1):
+		return True
+	for _ in range(s-1):
+		x = x*x % n
+		if(x == n-1):
+			return True
+	return False
+
+#strong Lucas probable prime test, Selfridge's parameters (n odd, not a square)
+def _strong_lucas_test(n):
+	D = 5
+	while(jacobi(D, n) != -1):
+		D = -D - 2 if D > 0 else -D + 2
+	P, Q = 1, (1 - D)//4
+	d, s = n+1, 0
+	while(d % 2 == 0):
+		d //= 2
+		s += 1
+	#U[k], V[k], Q^k from the most significant bit of d
+	U, V, Qk = 1, P, Q % n
+	for bit in bin(d)[3:]:
+		U, V, Qk = U*V % n, (V*V - 2*Qk) % n, Qk*Qk % n
+		if(bit == '1'):
+			U, V = P*U + V, D*U + P*V
+			if(U % 2): U += n
+			if(V % 2): V += n
+			U, V, Qk = (U//2) % n, (V//2) % n, Qk*Q % n
+	if(U == 0 or V == 0):
+		return True
+	for _ in range(s-1):
+		V, Qk = (V*V - 2*Qk) % n, Qk*Qk % n
+		if(V == 0):
+			return True
+	return False
+
+def is_probable_prime(n):
+	"""Deterministic primality test.
+	
+	Args:
+		- *n (int)*: the integer which primality you wish to test
+		
+	Returns:
+		- *(bool)*: True if n is prime (or a BPSW pseudoprime, none is known), False otherwise.
+	
+	Three stages :
+		- trial division by the primes below 1000 (a single gcd with their product)
+		- below 3.3e24, strong pseudoprime tests to fixed bases, which are proven to be exact
+		- above, Baillie-PSW : strong test to base 2 and strong Lucas test
+	"""
+	
+	if(n < 1000):
+		return n in _TRIAL_SET
+	if(math.gcd(n, _PRIMORIAL) != 1):
+		return False
+	if(n < 1000000):
+		return True
+	d, s = n-1, 0
+	while(d % 2 == 0):
+		d //= 2
+		s += 1
+	if(n < _MR_BASES[-1][0]):
+		for B, bases in _MR_BASES:
+			if(n < B):
+				break
+		for a in bases:
+			if(not _strong_test(n, a, d, s)):
+				return False
+		return True
+	if(not _strong_test(n, 2, d, s)):
+		return False
+	r = isqrt(n)
+	if(r*r == n):
+		return False
+	return _strong_lucas_test(n)
+
+
+def are_probable_primes(L):
+	"""Batch version of :func:`is_probable_prime`.
+	
+	Args:
+		- *L (List)*: a list of integers
+		
+	Returns:
+		- *(List)*: a list of booleans, True where L[i] is prime.
+	"""
+	
+	return [is_probable_prime(n) for n in L]
+
+def filter_probable_primes(L):
+	"""Keeps the primes of a list.
+	
+	Args:
+		- *L (List)*: a list of integers
+		
+	Returns:
+		- *(List)*: the elements of L which are prime, in the same order.
+	"""
+	
+	return [n for n in L if is_probable_prime(n)]
+
+#print(is_probable_prime(mersenne(521)), is_probable_prime(mersenne(523)))
+
+		
+#odd primes used to sieve the candidates of the prime and group generators
+_SIEVE_PRIMES = small_primes(2**16)[1:]
+
+def _sieve_progression(start, step, window, links=((1,0),)):
+	"""Sieves an arithmetic progression of candidates against small primes, window after window.
+	
+	Args:
+		- *start (int)*: the first candidate
+		- *step (int)*: the common difference
+		- *window (int)*: number of candidates sieved at once
+		
+	Optional Args:
+		- *links (List)*: pairs (a,b), a candidate c survives if no a*c+b has a prime factor below 2^16.
+		
+	Yields:
+		- *(List)*: the survivors of the next window, in increasing order. Never ends.
+	
+	For each prime r, the first index of the window where r divides a*c+b is computed once with an inverse mod r,
+	then shifted by the window size : sieving costs about window*sum(1/r) byte writes.
+	"""
+	
+	sieves = []
+	for a, b in links:
+		c0, s = a*start + b, a*step
+		#r can't be removed if it is one of the values a*c+b
+		for r in _SIEVE_PRIMES:
+			if(r >= c0):
+				break
+			if(s % r):
+				sieves.append((r, (-c0 * pow(s, r-2, r)) % r))
+	while(True):
+		flags = bytearray([1]) * window
+		for r, o in sieves:
+			if(o < window):
+				flags[o::r] = bytes(len(range(o, window, r)))
+		yield [start + i*step for i in compress(range(window), flags)]
+		start += window*step
+		sieves = [(r, (o - window) % r) for r, o in sieves]
+
+
+#values of the windows of candidates passing test, in order. Each window is tested in the pool if one is given
+def _passing(windows, test, pool=None, jobs=1, verbose=False):
+	tested = 0
+	for candidates in windows:
+		results = pool.imap(test, candidates, max(1, len(candidates)//(4*jobs))) if pool else map(test, candidates)
+		for c, ok in zip(candidates, results):
+			tested += 1
+			if(ok):
+				if(verbose): print(tested, "candidates tested")
+				yield c
+
+
+#windows of sieved candidates c = c0 mod step (step even), from x to b then from a to x (bounds included)
+def _prime_windows(x, a, b, c0, step, window):
+	for lo, hi in ((x, b), (a, x-1)):
+		c = lo + (c0 - lo) % step
+		if(c > hi):
+			continue
+		n = (hi - c)//(window*step) + 1
+		for i, candidates in zip(range(n), _sieve_progression(c, step, window)):
+			if(i == n-1):
+				candidates = [v for v in candidates if v <= hi]
+			yield candidates
+
+
+#odd candidates c = r mod m : (c0, step)
+def _odd_progression(r, m):
+	if(math.gcd(r, m) != 1):
+		raise ValueError("no prime p = "+str(r)+" mod "+str(m))
+	if(m % 2 == 0):
+		return r % m, m
+	return (r if r % 2 else r + m) % (2*m), 2*m
+
+
+#True if n has a prime factor which is not in base, a list of all the primes up to some bound
+def _not_smooth(n, base):
+	for q in base:
+		while(n % q == 0):
+			n //= q
+		if(n == 1):
+			return False
+	return True
+
+
+#one prime search, the first candidate is x
+def _search_prime(x, a, b, c0, step, base, window, pool=None, jobs=1, verbose=False):
+	for p in _passing(_prime_windows(x, a, b, c0, step, window), is_probable_prime, pool, jobs, verbose):
+		if(base is None or _not_smooth(p-1, base)):
+			return p
+	raise ValueError("no prime satisfying the constraints in ["+str(a)+", "+str(b)+"]")
+
+
+def _search_prime_task(args):
+	return _search_prime(*args)
+
+
+#génère un nombre premier entre a et b
+def rand_prime(a, b, k=0, verbose=False, r=1, m=2, smooth=0, jobs=1, window=2048):
 	"""Generates a random prime number between two integers.
 	
 	Args:
 		- *a (int)*: an integer
 		- *b (int)*: an integer such as b > a
-		- *k (int)*: the number of repetitions Rabin-Miller primality test.
 		
 	Optional Args:
+		- *k (int)*: ignored, kept for compatibility (used to be the number of Rabin-Miller rounds).
 		- *verbose (bool)*: set to True if you want a display.
+		- *r, m (int)*: congruence class, the prime is r mod m (gcd(r,m) = 1).
+		- *smooth (int)*: if > 0, p-1 has a prime factor > smooth (against Pollard's p-1).
+		- *jobs (int)*: number of processes testing the windows (1 : no process).
+		- *window (int)*: number of candidates sieved at once.
 		
 	Returns:
-		- *(int)*: a random pseudo-prime between a and b.
+		- *(int)*: a random odd prime in [a,b] (:func:`is_probable_prime`).
+	
+	A random start x is drawn, then the candidates from x on are sieved against the primes below 2^16 by windows,
+	and only the survivors are tested (the search wraps around to a after b). Raises ValueError if there is no such prime.
+	"""
+	
+	c0, step = _odd_progression(r, m)
+	base = small_primes(smooth+1) if smooth > 0 else None
+	pool = Pool(processes=jobs) if jobs > 1 else None
+	try:
+		p = _search_prime(random.randint(a,b), a, b, c0, step, base, window, pool, jobs, verbose)
+	finally:
+		if(pool is not None):
+			pool.terminate()
+	if(verbose): print("rand_prime :", p)
+	return p
+
+
+def rand_prime_bits(bits, r=1, m=2, smooth=0, jobs=1, window=2048):
+	"""Generates a random prime number of a given bit length, see :func:`rand_prime` for the options.
+	
+	Args:
+		- *bits (int)*: the bit length (>= 2)
 		
-	Why "pseudo-prime"? Because you can never be sure that they are prime with RM primality test.
+	Returns:
+		- *(int)*: a random odd prime in [2^(bits-1), 2^bits[
 	"""
 	
-	r = random.randint(a,b)
-	while(not rabin_miller(r,k)):
-		r = random.randint(a,b)
-	if(verbose): print("rand_prime :", r, "\nhas", 100*(1-1/(2**k)), "% chances to be prime")
-	return r
+	return rand_prime(2**(bits-1), 2**bits - 1, 0, False, r, m, smooth, jobs, window)
+
+
+def rand_primes(count, a, b, r=1, m=2, smooth=0, jobs=1, window=2048):
+	"""Generates many random prime numbers between two integers, to mint test keys in bulk.
+	
+	Args:
+		- *count (int)*: the number of primes
+		- *a (int)*: an integer
+		- *b (int)*: an integer such as b > a
+		
+	Optional Args:
+		- *r, m, smooth, window*: see :func:`rand_prime`.
+		- *jobs (int)*: number of processes, each one running whole searches (1 : no process).
+		
+	Returns:
+		- *(List)*: count random primes in [a,b], each one found from its own random start.
+	
+	The random starts are drawn by the calling process, so the workers never share a random state.
+	"""
+	
+	c0, step = _odd_progression(r, m)
+	base = small_primes(smooth+1) if smooth > 0 else None
+	tasks = [(random.randint(a,b), a, b, c0, step, base, window) for _ in range(count)]
+	if(jobs <= 1):
+		return [_search_prime(*t) for t in tasks]
+	with Pool(processes=jobs) as pool:
+		return pool.map(_search_prime_task, tasks)
+
+#p = rand_prime(2**511, 2**512, r=3, m=4, smooth=2**16, jobs=8, verbose=True)
+#L = rand_primes(1000, 2**511, 2**512, smooth=2**16, jobs=8)
+	
+
+#factorisations of p-1 already computed, by modulo
+_group_factors = {}
+
+def group_order_factors(p):
+	"""Factorisation of p-1, the order of Z/pZ* (p prime).
+	
+	Args:
+		- *p (int)*: a prime integer
+		
+	Returns:
+		- *(dict)*: the factorisation of p-1 {prime : exponent}.
+	
+	The result is cached : later calls with the same p are free.
+	"""
+	
+	if(p not in _group_factors):
+		_group_factors[p] = _factors(p-1)
+	return _group_factors[p]
+
+
+def element_order(a, p, factored_order):
+	"""Order of an element of a group of known order.
+	
+	Args:
+		- *a (int)*: an element of Z/pZ*
+		- *p (int)*: the modulo
+		- *factored_order (dict)*: the factorisation {prime : exponent} of the group order (or of a multiple of the order of a).
+		
+	Returns:
+		- *(int)*: the smallest k > 0 such that a^k = 1 mod p.
+	
+	For each prime q of the order, q is removed as long as a^k stays 1 : about sum(e) exponentiations.
+	"""
+	
+	k = 1
+	for q, e in factored_order.items():
+		k *= q**e
+	for q, e in factored_order.items():
+		k //= q**e
+		x = pow(a, k, p)
+		while(x != 1):
+			x = pow(x, q, p)
+			k *= q
+	return k
+
+
+def is_generator(a, p, facteurs=None):
+	"""Tests if a generates Z/pZ* (p prime).
+	
+	Args:
+		- *a (int)*: an integer
+		- *p (int)*: a prime integer
+		
+	Optional args:
+		- *facteurs (dict)*: the factorisation of p-1, see :func:`group_order_factors` if omitted.
+		
+	Returns:
+		- *(bool)*: True iff a^((p-1)/q) != 1 mod p for every prime q dividing p-1.
+	"""
+	
+	if(a % p == 0):
+		return False
+	if(facteurs is None):
+		facteurs = group_order_factors(p)
+	for q in facteurs:
+		if(pow(a, (p-1)//q, p) == 1):
+			return False
+	return True
+
+
+def test_generators(candidates, p):
+	"""Batch version of :func:`is_generator`.
 	
+	Args:
+		- *candidates (List)*: a list of integers
+		- *p (int)*: a prime integer
+		
+	Returns:
+		- *(List)*: a list of booleans, True where candidates[i] generates Z/pZ*.
+	
+	p-1 is factored once, and every exponent (p-1)/q is computed once for all the candidates.
+	"""
+	
+	exposants = [(p-1)//q for q in group_order_factors(p)]
+	return [a % p != 0 and all(pow(a, e, p) != 1 for e in exposants) for a in candidates]
+
 
-#retourne 0 si aucun generateur n'est trouve : p n'est pas premier
 def trouver_generateur(p):
-	for a in range(2, p):
-		r = a
-		i = 1
-		while r != 1:
-			i += 1
-			r = (r * a) % p
-		if i == p-1:
-			return a
-	return 0
+	"""Finds the smallest generator of Z/pZ*.
+	
+	Args:
+		- *p (int)*: a prime integer
+		
+	Returns:
+		- *(int)*: the smallest generator, 0 if p isn't prime.
+	"""
+	
+	if(not is_probable_prime(p)):
+		return 0
+	if(p == 2):
+		return 1
+	facteurs = group_order_factors(p)
+	a = 2
+	while(not is_generator(a, p, facteurs)):
+		a += 1
+	return a
 	
 #print trouver_generateur(13)
 	
-#trouve un générateur du groupe cyclique Z/pZ* par random
 def rand_gen(p):
- 	i = 1
- 	while(i < p-1):
- 		a = random.randint(2,p-1)
- 		r = a
- 		i = 1
- 		while(r != 1):
- 			i += 1
- 			r = (r*a)%p
- 	return a
+	"""Draws a random generator of Z/pZ*.
+	
+	Args:
+		- *p (int)*: a prime integer > 2
+		
+	Returns:
+		- *(int)*: a random generator. About p/phi(p-1) draws are needed, each costing one exponentiation per prime of p-1.
+	"""
+	
+	facteurs = group_order_factors(p)
+	a = random.randint(2,p-1)
+	while(not is_generator(a, p, facteurs)):
+		a = random.randint(2,p-1)
+	return a
+
+#q and 2q+1 both prime
+def _is_safe_candidate(q):
+	return is_probable_prime(q) and is_probable_prime(2*q + 1)
+
+
+#first value of the windows of candidates passing test, the windows are tested in a pool if jobs > 1
+def _first_passing(windows, test, jobs, verbose):
+	pool = Pool(processes=jobs) if jobs > 1 else None
+	try:
+		return next(_passing(windows, test, pool, jobs, verbose))
+	finally:
+		if(pool is not None):
+			pool.terminate()
+
+
+#element of order q of Z/pZ*, p = k*q+1 with q prime
+def _subgroup_generator(p, k):
+	g = 1
+	while(g == 1):
+		g = pow(random.randint(2, p-1), k, p)
+	return g
+
+
+def schnorr_group(q, bits=None, jobs=1, window=2048, verbose=False):
+	"""Generates a Schnorr group for the DLP : a prime p = k*q+1 and a generator of the subgroup of order q.
+	
+	Args:
+		- *q (int)*: an odd prime integer, the order of the subgroup
+		
+	Optional Args:
+		- *bits (int)*: bit length of p. If omitted, the smallest k >= 2 is returned.
+		- *jobs (int)*: number of processes running the primality tests (1 : no process).
+		- *window (int)*: number of values of k sieved at once.
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int,int,int,int)*: g,p,q,k with p = k*q+1 prime and g of order q mod p.
+	
+	The values of k are sieved so that k*q+1 has no factor below 2^16 : only about 1 candidate in 10 is tested.
+	"""
+	
+	if(verbose): print("\n====== Schnorr group ======")
+	if(bits is None):
+		k = 2
+	else:
+		#random start in the lower half of the range, far enough from the top to find a prime
+		k = (random.randint(2**(bits-1), 3*2**(bits-2)) // q) + 1
+		if(k < 2):
+			raise ValueError("q is too large for a "+str(bits)+" bits modulo")
+	k += k % 2
+	p = _first_passing(_sieve_progression(k*q + 1, 2*q, window), is_probable_prime, jobs, verbose)
+	k = (p-1) // q
+	if(verbose): print(p,"=",k,"x",q,"+ 1")
+	return _subgroup_generator(p, k), p, q, k
+
+
+def safe_prime_group(bits, jobs=1, window=2048, verbose=False):
+	"""Generates a random safe prime p = 2*q+1 (q prime) and a generator of the subgroup of order q.
+	
+	Args:
+		- *bits (int)*: bit length of p (>= 4)
+		
+	Optional Args:
+		- *jobs (int)*: number of processes running the primality tests (1 : no process).
+		- *window (int)*: number of values of q sieved at once.
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int,int,int,int)*: g,p,q,2 with p and q prime and g of order q mod p (the quadratic residues).
+	
+	q and 2q+1 are sieved together, so a candidate is tested only if neither has a factor below 2^16.
+	"""
+	
+	if(verbose): print("\n====== Safe prime group ======")
+	if(bits < 4):
+		raise ValueError("bits must be >= 4")
+	q = random.randint(2**(bits-2), 3*2**(bits-3)) | 1
+	q = _first_passing(_sieve_progression(q, 2, window, ((1,0),(2,1))), _is_safe_candidate, jobs, verbose)
+	p = 2*q + 1
+	if(verbose): print(p,"= 2 x",q,"+ 1")
+	return _subgroup_generator(p, 2), p, q, 2
+
+#g,p,q,k = safe_prime_group(1024, 8, verbose=True)
+#g,p,q,k = schnorr_group(rand_prime(2**159, 2**160, 10), 1024, 8, True)
+
  	
 def get_group(n, verbose=False):
 	"""Generates a "safe" group for the DLP
@@ -393,22 +1756,14 @@ def get_group(n, verbose=False):
 		- *verbose (bool)*: set to True if you want a display.
 		
 	Returns:
-		- *(int,int)*: g,p with p a prime integer such that p = k*n with some small integer k. And g is a generator of Z/pZ*
+		- *(int,int)*: g,p with p a prime integer such that p = k*n+1 with the smallest even integer k. And g generates the subgroup of order n of Z/pZ*
 		
+	See :func:`schnorr_group` for the sieve, bit length and parallel options.
 	"""
 	
 	if(verbose): print("\n====== Group generator ======")
 	if(verbose): print("prime seed :",n)
-	k = 2
-	p = k*n + 1
-	while(rabin_miller(p,10)==False):
-		k += 1
-		p = k*n + 1
-	g = 1
-	if(verbose): print(p,"=",k,"x",n,"+ 1")
-	while(g==1):
-		h = random.randint(2,p-1)
-		g = exp_mod(h,k,p)
+	g, p, q, k = schnorr_group(n, verbose=verbose)
 	return g,p
 	
 #n = rand_prime(1000000,2000000,10)
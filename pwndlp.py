@@ -34,8 +34,10 @@ __status__ = "Beta"
 """
 
 
-import itools, random, pyfacto, time
-from multiprocessing import Process, Queue
+import heapq, itools, json, os, random, pyfacto, time
+from array import array
+from multiprocessing import Process, Queue, Value
+from queue import Empty
 
 random.seed()
 
@@ -73,7 +75,7 @@ def rho_pollard_dlp(g, h, p, n, verbose=False):
 	while(y==0):
 		if(verbose): print("starting new walk..")
 		gx, hx = random.randint(0,p), random.randint(0,p)
-		x = ( itools.exp_mod(g,gx,n)*itools.exp_mod(h,hx,n) ) % n
+		x = itools.multi_exp([g,h],[gx,hx],n)
 		gy, hy = gx, hx
 		y = x
 	
@@ -113,9 +115,14 @@ def rho_pollard_dlp(g, h, p, n, verbose=False):
 	return (x*y)%p
 
 
-#TODO: use mixed walks (instead of only adding walks).
-def rho_pollard_dlp_adv(g, h, p, n, b, k, verbose=False):
-	"""Improved version of Pollard's Rho applied to DLP. It uses k-adding walks.
+#partition of x in a walk of r partitions : Fibonacci hashing of the 64 low bits of x, cheaper than x % r
+#and independent of the lowest bits alone (those of the distinguished points)
+_FIB = 0x9E3779B97F4A7C15
+_M64 = 2**64 - 1
+
+
+def rho_pollard_dlp_adv(g, h, p, n, b, k, verbose=False, walk="adding", squarings=4, stats=None):
+	"""Improved version of Pollard's Rho applied to DLP. It uses k-adding walks, or mixed walks.
 	
 	Args:
 		- *g (int)*: a generator
@@ -127,11 +134,22 @@ def rho_pollard_dlp_adv(g, h, p, n, b, k, verbose=False):
 		
 	Optional args:
 		- *verbose (bool)*: set to True if you want a display.
+		- *walk (str)*: "adding" (k-adding walk), "mixed" (k multiplying partitions plus squarings squaring partitions)
+		  or "pollard" (the walk of :func:`rho_pollard_dlp` : multiply by g, by h or square).
+		- *squarings (int)*: number of squaring partitions of the mixed walk.
+		- *stats (dict)*: if given, filled with the number of iterations of Floyd's cycle finding ("iterations").
 		
 	Returns:
 		- *(int)*: x such that [x]g = h mod n
 	
+	The partition of x is a hash of its low bits. Teske's mixed walks (k = 16, squarings = 4) are
+	a little more random than k-adding walks, so they need slightly fewer iterations on average.
 	"""
+	
+	if(walk not in ("adding", "mixed", "pollard")):
+		raise ValueError("unknown walk "+str(walk))
+	if(stats is not None):
+		stats["iterations"] = 0
 	#Bruteforce to start
 	x = g
 	if(verbose): print("Brute Forcing..")
@@ -142,94 +160,345 @@ def rho_pollard_dlp_adv(g, h, p, n, b, k, verbose=False):
 			return i+1
 			
 	if(verbose): print("computing f..")
+	bits = max(b,p).bit_length()
+	G = itools.FixedBase(g,n,bits)
+	H = itools.FixedBase(h,n,bits)
 	puissances = []
 	coefficients = []
-	for s in range(k):
-		ms,ns = 0,0
-		while(ms==0 and ns==0):
-			ms,ns = random.randint(0,b), random.randint(0,b)
-		puissances.append((ms,ns))
-		coefficients.append( (itools.exp_mod(g,ms,n) * itools.exp_mod(h,ns,n)) % n)
+	if(walk == "pollard"):
+		puissances = [(1,0), (0,1)]
+		coefficients = [g % n, h % n]
+		squarings = 1
+	else:
+		for s in range(k):
+			ms,ns = 0,0
+			while(ms==0 and ns==0):
+				ms,ns = random.randint(0,b), random.randint(0,b)
+			puissances.append((ms,ns))
+			coefficients.append( (G.pow(ms) * H.pow(ns)) % n)
+		if(walk == "adding"):
+			squarings = 0
+	#partitions 0..m-1 multiply, m..r-1 square
+	m = len(coefficients)
+	r = m + squarings
 	
+	iterations = 0
 	x,y = 0,0
 	while(y==0):
 		if(verbose): print("starting new walk..")
 		gx, hx = random.randint(0,p-1), random.randint(0,p-1)
-		x = ( itools.exp_mod(g,gx,n)*itools.exp_mod(h,hx,n) ) % n
+		x = ( G.pow(gx)*H.pow(hx) ) % n
 		gy, hy = gx, hx
 		y = x
 	
 		loop = True
 	
 		while(loop):
+			iterations += 1
 			#x[i]
-			i = x % k
-			ms,ns = puissances[i]
-			coef = coefficients[i]			
-			x = (x*coef) % n
-			gx, hx = (gx+ms)%p, (hx+ns)%p
+			i = (((x & _M64)*_FIB & _M64)*r) >> 64
+			if(i < m):
+				ms,ns = puissances[i]
+				x = (x*coefficients[i]) % n
+				gx, hx = (gx+ms)%p, (hx+ns)%p
+			else:
+				x = (x*x) % n
+				gx, hx = (2*gx)%p, (2*hx)%p
 		
 			#x[2i]
 			for _ in range(2):
-				i = y % k
-				ms,ns = puissances[i]			
-				coef = coefficients[i]			
-				y = (y*coef) % n
-				gy, hy = (gy+ms)%p, (hy+ns)%p
+				i = (((y & _M64)*_FIB & _M64)*r) >> 64
+				if(i < m):
+					ms,ns = puissances[i]
+					y = (y*coefficients[i]) % n
+					gy, hy = (gy+ms)%p, (hy+ns)%p
+				else:
+					y = (y*y) % n
+					gy, hy = (2*gy)%p, (2*hy)%p
 				
 			if(x==y): loop = False
 	
 		x = (gy - gx +p)%p
 		y = (hx - hy +p)%p
 
+	if(stats is not None):
+		stats["iterations"] = iterations
 	y = itools.inversion_modulaire(y,p)
 	if(verbose): print("rho_pollard_dlp_adv :\n[",(x*y)%p,"]",g,"=",h)
 	return (x*y)%p
+
+
+class RhoWalk(object):
+	"""The k-adding walk shared by all the workers of a parallel rho : x -> x*g^ms*h^ns, (ms, ns) chosen by x % k.
 	
-#sub-function for parallelized Pollard's Rho
-#TODO: set distinguished points criteria dynamically.
-def sub_rho(g, h, p, n, coefficients, puissances, k, dico):
+	Args:
+		- *g (int)*: a generator
+		- *h (int)*: an integer in <g>
+		- *p (int)*: the order of <g>
+		- *n (int)*: the modulo
+		- *b (int)*: exponent bound of the steps
+		- *k (int)*: number of partitions
+		- *seed (int)*: seed of the steps, the walk is the same everywhere for the same arguments.
+	"""
 	
-	if(itools.ilog(n,2) > 40):
-		critere = 2**(itools.ilog(n,2)-14)
-	elif(itools.ilog(n,2) > 20):
-		critere = 2**(itools.ilog(n,2)-10)
-	else:
-		critere = 2**(itools.ilog(n,2)//2)
+	def __init__(self, g, h, p, n, b, k, seed):
+		self.g, self.h, self.p, self.n, self.b, self.k, self.seed = g, h, p, n, b, k, seed
+		bits = max(b,p).bit_length()
+		self.G = itools.FixedBase(g,n,bits)
+		self.H = itools.FixedBase(h,n,bits)
+		rng = random.Random(seed)
+		self.puissances = []
+		self.coefficients = []
+		for s in range(k):
+			ms,ns = 0,0
+			while(ms==0 and ns==0):
+				ms,ns = rng.randint(0,b), rng.randint(0,b)
+			self.puissances.append((ms,ns))
+			self.coefficients.append( (self.G.pow(ms) * self.H.pow(ns)) % n)
 	
-	points = 0
-	y = 0
-	while(y==0):
+	def start(self, rng):
+		"""Returns a random starting point (x, gx, hx) with x = g^gx*h^hx, drawn from rng."""
+		gx, hx = rng.randrange(self.p), rng.randrange(self.p)
+		return ( self.G.pow(gx)*self.H.pow(hx) ) % self.n, gx, hx
+
+
+class TagWalk(RhoWalk):
+	"""The k-adding walk of the tag-tracing rho (Cheon, Hong and Kim) : x -> x*g^ms*h^ns, (ms, ns) chosen by the tag of x.
 	
-		gx, hx = random.randint(0,p-1), random.randint(0,p-1)
-		x = ( itools.exp_mod(g,gx,n)*itools.exp_mod(h,hx,n) ) % n
+	Args:
+		- *g (int)*: a generator
+		- *h (int)*: an integer in <g>
+		- *p (int)*: the order of <g>
+		- *n (int)*: the modulo
+		- *b (int)*: exponent bound of the steps
+		- *k (int)*: number of partitions
+		- *seed (int)*: seed of the steps, same steps as :class:`RhoWalk` for the same seed.
+		
+	Optional args:
+		- *depth (int)*: number of steps between two full multiplications (chosen for a table of about 4096 products if omitted).
+		- *w (int)*: bits of the tags.
+		- *guard (int)*: guard bits of the approximation, it is checked exactly once every 2^guard steps.
 	
-		loop = True
+	The tag of x is floor(x*2^w/n) : its top bits choose the step and its low bits make the distinguished points.
+	The walk keeps a point Y and the product M of the steps made since Y (the products of up to depth steps are
+	precomputed, with A = floor(M*2^(L+w+guard)/n), L the bit length of n) : the tag of Y*M mod n is then read
+	in the bits of Y*A, a product without reduction modulo n. Y*M mod n is computed once every depth steps.
+	"""
 	
-		while(loop):	
-			i = x % k
-			ms,ns = puissances[i]
-			coef = coefficients[i]			
-			x = (x*coef) % n
-			gx, hx = (gx+ms)%p, (hx+ns)%p
-		
-			if(x % critere == x):
-				#print("distinguished point hit", points)
-				points += 1
-				if(x in dico.keys()):
-					loop = False
-					gy,hy = dico[x]
-					x = (gy - gx +p)%p
-					y = (hx - hy +p)%p
-				else:
-					dico[x] = (gx,hx)
+	def __init__(self, g, h, p, n, b, k, seed, depth=None, w=64, guard=8):
+		RhoWalk.__init__(self, g, h, p, n, b, k, seed)
+		if(depth is None):
+			depth = 1
+			while(k**(depth+1) <= 4096):
+				depth += 1
+		self.depth, self.w, self.guard = depth, w, guard
+		#the products of the sequences of steps : the code of (i1, ..., ij) is c(i1, ..., ij-1)*k + ij + 1, c() = 0
+		self.full = (k**depth - 1)//(k - 1)
+		size = (k**(depth+1) - 1)//(k - 1)
+		K = n.bit_length() + w + guard
+		self.products = [1]
+		self.fractions = [(1 << K)//n]
+		for c in range(1, size):
+			M = (self.products[(c-1)//k]*self.coefficients[(c-1) % k]) % n
+			self.products.append(M)
+			self.fractions.append((M << K)//n)
+	
+	def tag(self, x):
+		"""Returns the tag floor(x*2^w/n) of x."""
+		return (x << self.w)//self.n
+
+
+class DPStore(object):
+	"""The distinguished points (x, gx, hx), x = g^gx*h^hx, found by rho walks in a group of prime order p.
+	
+	Args:
+		- *p (int)*: the order of <g>
 		
-	y = itools.inversion_modulaire(y,p)
-	return (x*y)%p
-			
+	Optional args:
+		- *path (str)*: append-only log of the points, reloaded if it exists (one line "x gx hx" in hex per point).
 	
+	The log is written through a buffer : :meth:`flush` makes the points written so far durable (fsync),
+	so that the caller chooses how many points a crash may lose.
+	"""
+	
+	def __init__(self, p, path=None):
+		self.p = p
+		self.points = {}
+		self.log = None
+		self.file = None
+		if(path is None):
+			return
+		if(os.path.exists(path)):
+			with open(path, "rb+") as f:
+				data = f.read()
+				#a line cut by a crash is dropped
+				end = data.rfind(b"\n") + 1
+				if(end < len(data)):
+					f.truncate(end)
+			for line in data[:end].decode().splitlines():
+				x, gx, hx = [int(v, 16) for v in line.split()]
+				y = self._insert(x, gx, hx)
+				if(y is not None):
+					self.log = y
+		self.file = open(path, "a")
+	
+	def __len__(self):
+		return len(self.points)
+	
+	#stores a point, returns the log if it collides
+	def _insert(self, x, gx, hx):
+		if(x not in self.points):
+			self.points[x] = (gx, hx)
+			return None
+		#g^gz*h^hz = g^gx*h^hx
+		gz, hz = self.points[x]
+		if((hx - hz) % self.p == 0):
+			return None
+		return ((gz - gx)*itools.inversion_modulaire((hx - hz) % self.p, self.p)) % self.p
+	
+	def add(self, x, gx, hx):
+		"""Stores a distinguished point (and appends it to the log).
+		
+		Returns:
+			- *(int)*: the log of h if x was already stored with another representation, None else.
+		"""
+		
+		if(self.file is not None):
+			self.file.write("%x %x %x\n" % (x, gx, hx))
+		return self._insert(x, gx, hx)
+	
+	def flush(self):
+		"""Writes the buffered points of the log to the disk."""
+		if(self.file is not None):
+			self.file.flush()
+			os.fsync(self.file.fileno())
+	
+	def close(self):
+		"""Flushes and closes the log."""
+		if(self.file is not None):
+			self.flush()
+			self.file.close()
+			self.file = None
+
+#writes a JSON checkpoint : to a temporary file, then renamed, so that a crash leaves the old one or the new one
+def _save_json(path, obj):
+	with open(path + ".tmp", "w") as f:
+		json.dump(obj, f)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(path + ".tmp", path)
+
+#reads a JSON checkpoint, None if there is none
+def _load_json(path):
+	if(not os.path.exists(path)):
+		return None
+	with open(path) as f:
+		return json.load(f)
+
+
+#mask of the distinguished points (x & mask == 0) : about 32 points per walk of steps
+def _dp_mask(steps):
+	return (1 << (max(1, steps//32).bit_length() - 1)) - 1
 
-def rho_pollard_dlp_par(g, h, p, n, b, k, jobs=8, verbose=False):
+#bytes of a distinguished point in a DPStore : dict entry, x < n, tuple of 2 exponents < p
+def _dp_point_size(p, n):
+	return 200 + (n.bit_length() + 2*p.bit_length())//8
+
+
+def dp_mask(p, n, walks, memory=2**28):
+	"""Criterion of the distinguished points of a parallel rho : x is distinguished if x & mask == 0.
+	
+	Args:
+		- *p (int)*: the order of the group
+		- *n (int)*: the modulo
+		- *walks (int)*: number of walks
+		
+	Optional args:
+		- *memory (int)*: memory budget of the stored points in bytes.
+		
+	Returns:
+		- *(int)*: the mask, a distinguished point appears every mask+1 steps on average.
+	
+	The walks need sqrt(pi*p/2) steps in total, the rate is chosen to give about 32 points per walk
+	(a collision is detected 1/32 of a walk late) unless the expected points wouldn't fit in memory.
+	"""
+	
+	T = itools.isqrt(p*1571//1000)
+	interval = max(1, T//(32*walks), -(-T*_dp_point_size(p, n)//memory))
+	return (1 << (interval - 1).bit_length()) - 1
+
+#sub-function for parallelized Pollard's Rho : walks of the shared function W, their distinguished points go to the parent.
+#A walk without distinguished point for too long is in a cycle : it restarts. start is a point (x, gx, hx) to resume from.
+#bits is a shared Value : the parent may raise the number of bits of the mask, it is read at each distinguished point.
+def sub_rho(W, mask, seed, worker, output_queue, start=None, bits=None):
+	rng = random.Random(seed)
+	p, n, k = W.p, W.n, W.k
+	puissances, coefficients = W.puissances, W.coefficients
+	patience = 20*(mask+1)
+	steps = 0
+	while(True):
+		x, gx, hx = start or W.start(rng)
+		start = None
+		last = steps
+		while(steps - last < patience):
+			i = x % k
+			ms,ns = puissances[i]
+			x = (x*coefficients[i]) % n
+			gx, hx = gx+ms, hx+ns
+			steps += 1
+			if(not x & mask):
+				gx, hx = gx%p, hx%p
+				output_queue.put((worker, steps, x, gx, hx))
+				last = steps
+				if(bits is not None):
+					mask = (1 << bits.value) - 1
+					patience = 20*(mask+1)
+
+#sub-function for parallelized Pollard's Rho with the TagWalk W, see sub_rho : the points are Y*products[c] mod n.
+#A tag whose guard bits are all ones may be one too small : it is computed exactly.
+def sub_rho_tag(W, mask, seed, worker, output_queue, start=None, bits=None):
+	rng = random.Random(seed)
+	p, n, k, w, guard = W.p, W.n, W.k, W.w, W.guard
+	puissances, products, fractions, full = W.puissances, W.products, W.fractions, W.full
+	shift = n.bit_length()
+	tmask = (1 << (w + guard)) - 1
+	gmask = (1 << guard) - 1
+	patience = 20*(mask+1)
+	steps = 0
+	while(True):
+		Y, gx, hx = start or W.start(rng)
+		start = None
+		c = 0
+		last = steps
+		while(steps - last < patience):
+			t = ((Y*fractions[c]) >> shift) & tmask
+			if((t & gmask) == gmask):
+				t = ((Y*products[c] % n) << w)//n
+			else:
+				t >>= guard
+			if(not t & mask and steps > last):
+				Y = (Y*products[c]) % n
+				c = 0
+				gx, hx = gx%p, hx%p
+				output_queue.put((worker, steps, Y, gx, hx))
+				last = steps
+				if(bits is not None):
+					mask = (1 << bits.value) - 1
+					patience = 20*(mask+1)
+			i = (t*k) >> w
+			ms,ns = puissances[i]
+			gx, hx = gx+ms, hx+ns
+			c = c*k + i + 1
+			if(c >= full):
+				Y = (Y*products[c]) % n
+				c = 0
+			steps += 1
+
+#the walks of the parallel rho : class of the walk and function of the workers
+_RHO_WALKS = {"adding": (RhoWalk, sub_rho), "tag": (TagWalk, sub_rho_tag)}
+
+
+def rho_pollard_dlp_par(g, h, p, n, b, k, jobs=8, verbose=False, stats=None, checkpoint=None, sync=256, memory=2**28, walk=None):
 	"""Improved parallelized version of Pollard's Rho applied to DLP. Uses distinguished points for optimal efficiency.
 	
 	Args:
@@ -243,11 +512,41 @@ def rho_pollard_dlp_par(g, h, p, n, b, k, jobs=8, verbose=False):
 	Optional args:
 		- *jobs (int)*: number of threads to launch. Should be your number of virtual cores.
 		- *verbose (bool)*: set to True if you want a display.
+		- *stats (dict)*: if given, filled with the number of distinguished points ("points"), of steps of all
+		  the walks ("steps") and of the longest worker ("walk_steps"), the time ("time"), the rate of distinguished
+		  points expected from the masks used ("dp_expected") and the rate observed ("dp_observed"),
+		  zeros when the log is found without the parallel walks.
+		- *checkpoint (str)*: a directory where the attack is saved, and resumed from if it was already started.
+		- *sync (int)*: the checkpoint is written to the disk every sync distinguished points.
+		- *memory (int)*: memory budget of the distinguished points in bytes, see :func:`dp_mask`.
+		- *walk (str)*: "adding" (:class:`RhoWalk`) or "tag" (:class:`TagWalk`, fewer reductions modulo n,
+		  faster when n has 512 bits or more). Chosen from the size of n if omitted.
 		
 	Returns:
 		- *(int)*: x such that [x]g = h mod n
+	
+	Every worker walks the same function and sends its distinguished points to the parent, which keeps
+	them all in one dict : two walks of different workers meeting give the log, so the number of steps
+	of each worker is divided by jobs. Small orders are solved by :func:`rho_pollard_dlp_adv`.
+	
+	The rate of distinguished points comes from :func:`dp_mask`. Each time the store doubles, its growth
+	is projected on the steps left (at least half of those done) : while it overflows the budget, the rate
+	is halved for all the workers.
+	
+	The checkpoint holds the log of the distinguished points ("points", see :class:`DPStore`) and a state
+	("state" : the problem, the seed of the walk, the mask and the last point of every worker, the point
+	a worker resumes from). Both are synced together, a crash loses at most sync points.
 	"""
 	
+	if(walk is None):
+		walk = "tag" if(n.bit_length() >= 512) else "adding"
+	if(walk not in _RHO_WALKS):
+		raise ValueError("unknown walk "+str(walk))
+	t0 = time.monotonic()
+	#filled on every return : no distinguished point when the log is found before the parallel walks
+	if(stats is None):
+		stats = {}
+	stats.update(points=0, steps=0, walk_steps=0, time=0, dp_expected=0, dp_observed=0)
 	#Bruteforce to start
 	x = g
 	if(verbose): print("Brute Forcing..")
@@ -255,36 +554,612 @@ def rho_pollard_dlp_par(g, h, p, n, b, k, jobs=8, verbose=False):
 		x = (x*g)%n
 		if(x==h):
 			if(verbose): print("rho_pollard_dlp_par :\n[",i+1,"]",g,"=",h)
+			stats.update(steps=i, walk_steps=i, time=time.monotonic()-t0)
 			return i+1
+	
+	steps = itools.isqrt(p)//jobs
+	if(steps < 2**9):
+		adv = {}
+		x = rho_pollard_dlp_adv(g, h, p, n, b, k, verbose, stats=adv)
+		#3 steps per iteration of Floyd's cycle finding
+		stats.update(steps=3*adv["iterations"], walk_steps=3*adv["iterations"], time=time.monotonic()-t0)
+		return x
 			
+	state = {"g": g, "h": h % n, "p": p, "n": n, "b": b, "k": k, "seed": random.getrandbits(64), "mask": dp_mask(p, n, jobs, memory), "walk": walk, "walks": []}
+	if(checkpoint is not None):
+		os.makedirs(checkpoint, exist_ok=True)
+		saved = _load_json(os.path.join(checkpoint, "state"))
+		if(saved is not None):
+			if([saved[key] for key in ("g", "h", "p", "n")] != [g, h % n, p, n]):
+				raise ValueError("the checkpoint "+checkpoint+" is for another DLP")
+			if(verbose): print("resuming from",checkpoint)
+			state = saved
+		else:
+			_save_json(os.path.join(checkpoint, "state"), state)
+	if("log" in state):
+		stats.update(time=time.monotonic()-t0)
+		return state["log"]
+	
 	if(verbose): print("computing f..")
-	puissances = []
-	coefficients = []
-	for s in range(k):
-		ms,ns = 0,0
-		while(ms==0 and ns==0):
-			ms,ns = random.randint(0,b), random.randint(0,b)
-		puissances.append((ms,ns))
-		coefficients.append( (itools.exp_mod(g,ms,n) * itools.exp_mod(h,ns,n)) % n)
-		
-	if(verbose): print("launching distributed attack")
-	dico = {}
+	Walk, sub = _RHO_WALKS[state.get("walk", "adding")]
+	W = Walk(g, h, p, n, state["b"], state["k"], state["seed"])
+	mask = state["mask"]
+	dico = DPStore(p, None if(checkpoint is None) else os.path.join(checkpoint, "points"))
+	walks = state["walks"] + [None]*(jobs - len(state["walks"]))
+	x = dico.log
+	#each time the store doubles, its growth since the last check is projected on the steps left
+	T = itools.isqrt(p*1571//1000)
+	budget = memory//_dp_point_size(p, n)
+	check, last_points, last_steps = max(16, 2*len(dico)), len(dico), 0
+	#points expected from the steps walked with the previous masks
+	expected, adapted = 0, 0
+	bits = Value('i', mask.bit_length())
 		
-	def core(g, h, p, n, coefficients, puissances, k, dico, output_queue): output_queue.put(sub_rho(g, h, p, n, coefficients, puissances, k, dico))
+	if(verbose): print("launching distributed attack, distinguished points : x &",mask,"== 0, expected",T//(mask+1),"points (",len(dico),"already found )")
+	def core(worker, seed, output_queue, start): sub(W, mask, seed, worker, output_queue, start, bits)
 	queue = Queue()
 	procs = []
 	for j in range(jobs):
-		procs.append(Process(target=core, args=(g, h, p, n, coefficients, puissances, k, dico, queue)))
-	for p in procs:
-		p.start()
-	x = queue.get()
-	for p in procs:
-		p.terminate()
-	if(verbose): print("rho_pollard_dlp_par :\n[",x,"]",g,"=",h)
+		procs.append(Process(target=core, args=(j, random.getrandbits(64), queue, walks[j] and tuple(walks[j]))))
+	for proc in procs:
+		proc.start()
+	walked = [0]*jobs
+	received = 0
+	while(x is None):
+		worker, s, y, gy, hy = queue.get()
+		walked[worker] = s
+		walks[worker] = [y, gy, hy]
+		x = dico.add(y, gy, hy)
+		received += 1
+		if(len(dico) >= check):
+			total = sum(walked)
+			rate = (len(dico) - last_points)/max(1, total - last_steps)
+			remaining = max(T - total, total//2)
+			room = max(budget - len(dico), budget//16)
+			if(rate*remaining > room):
+				expected += (total - adapted)/(mask+1)
+				adapted = total
+				while(rate*remaining > room):
+					mask = 2*mask + 1
+					rate /= 2
+				bits.value = mask.bit_length()
+				state["mask"] = mask
+				if(verbose): print("store of",len(dico),"points growing too fast : distinguished points now x &",mask,"== 0")
+			check, last_points, last_steps = 2*len(dico), len(dico), total
+		if(checkpoint is not None and received % sync == 0):
+			dico.flush()
+			state["walks"] = walks
+			_save_json(os.path.join(checkpoint, "state"), state)
+	for proc in procs:
+		proc.terminate()
+	dico.close()
+	if(checkpoint is not None):
+		state["log"] = x
+		_save_json(os.path.join(checkpoint, "state"), state)
+	total = max(1, sum(walked))
+	expected = (expected + (total - adapted)/(mask+1))/total
+	stats.update(points=len(dico)+1, steps=sum(walked), walk_steps=max(walked), time=time.monotonic()-t0, dp_expected=expected, dp_observed=received/total)
+	if(verbose): print("distinguished points : expected rate",expected,", observed rate",received/total)
+	if(verbose): print("rho_pollard_dlp_par :\n[",x,"]",g,"=",h,"(",len(dico)+1,"distinguished points,",sum(walked),"steps )")
+	return x
+		
+
+class BSGSTable(object):
+	"""Baby steps of Shanks' baby-step giant-step algorithm, in the subgroup of prime order q of Z/nZ*.
+	
+	Args:
+		- *g (int)*: a generator of the subgroup
+		- *q (int)*: its order
+		- *n (int)*: the modulo
+		
+	Optional args:
+		- *memory (int)*: upper bound of the size of the table in bytes. Fewer baby steps mean more giant steps.
+	
+	The m baby steps g^j are stored in an open-addressed array (linear probing, load <= 1/2) of 32 bits
+	tags of g^j and of the indices j : 8 bytes per slot, the largest power of two of slots within memory,
+	instead of a dict of big integers.
+	A tag collision is checked with one exponentiation. The table is reused by every call to :meth:`log`.
+	"""
+	
+	def __init__(self, g, q, n, memory=2**27):
+		self.g, self.q, self.n = g, q, n
+		#largest table of 8 bytes slots within the budget, then at most size/2 baby steps
+		size = 1 << max(1, (memory // 8).bit_length() - 1)
+		self.m = m = max(1, min(itools.isqrt(q) + 1, size // 2))
+		self.giants = -(-q // m)
+		size = min(size, 1 << (2*m - 1).bit_length())
+		self.mask = size - 1
+		self.shift = size.bit_length()
+		self.tags = array('I', [0]) * size
+		self.index = array('I', [0]) * size
+		x = 1
+		for j in range(m):
+			s = x & self.mask
+			while(self.tags[s]):
+				s = (s + 1) & self.mask
+			self.tags[s] = ((x >> self.shift) & 0xFFFFFFFF) | 1
+			self.index[s] = j
+			x = x*g % n
+		#giant step : g^-m
+		self.giant = itools.inversion_modulaire(x, n)
+	
+	def log(self, h):
+		"""Discrete logarithm in the subgroup.
+		
+		Args:
+			- *h (int)*: an element of <g>
+			
+		Returns:
+			- *(int)*: x such that g^x = h mod n. Raises ValueError if h isn't in <g>.
+		
+		At most q/m giant steps.
+		"""
+		
+		g, n, mask, shift = self.g, self.n, self.mask, self.shift
+		tags, index = self.tags, self.index
+		h %= n
+		y = h
+		for i in range(self.giants):
+			s = y & mask
+			t = ((y >> shift) & 0xFFFFFFFF) | 1
+			while(tags[s]):
+				if(tags[s] == t):
+					x = (i*self.m + index[s]) % self.q
+					if(pow(g, x, n) == h):
+						return x
+				s = (s + 1) & mask
+			y = y*self.giant % n
+		raise ValueError(str(h)+" is not in the subgroup generated by "+str(g))
+
+
+def bsgs(g, h, q, n, memory=2**27, verbose=False):
+	"""Shanks' baby-step giant-step algorithm applied to DLP.
+	
+	Args:
+		- *g (int)*: a generator
+		- *h (int)*: an integer in <g>
+		- *q (int)*: the order of <g>
+		- *n (int)*: the modulo
+		
+	Optional args:
+		- *memory (int)*: memory budget of the baby steps in bytes, see :class:`BSGSTable`.
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int)*: x such that [x]g = h mod n
+	
+	Deterministic, about 2*sqrt(q) multiplications when the budget allows sqrt(q) baby steps.
+	"""
+	
+	x = BSGSTable(g, q, n, memory).log(h)
+	if(verbose): print("bsgs :\n[",x,"]",g,"=",h)
 	return x
+
+#g,p,q,k = itools.schnorr_group(itools.rand_prime_bits(40), 128)
+#bsgs(g, itools.exp_mod(g, random.randrange(q), p), q, p, verbose=True)
+
+
+#jumps of the kangaroos : the k first powers of 2 (mean about m), and g raised to them
+def _kangaroo_jumps(g, n, m):
+	k = 1
+	while(2**k - 1 < m*k):
+		k += 1
+	sizes = [2**i for i in range(k)]
+	return sizes, [itools.exp_mod(g, s, n) for s in sizes]
+
+
+def kangaroo(g, h, a, b, n, p=None, verbose=False):
+	"""Pollard's kangaroo (lambda) method applied to DLP, when the logarithm is known to lie in [a, b].
+	
+	Args:
+		- *g (int)*: a generator
+		- *h (int)*: an integer g^x with a <= x <= b
+		- *a (int)*: lower bound of the interval
+		- *b (int)*: upper bound of the interval
+		- *n (int)*: the modulo
 		
+	Optional args:
+		- *p (int)*: the order of <g>, if known (the result is then reduced modulo p).
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int)*: x such that [x]g = h mod n. Raises ValueError if the log isn't in [a, b].
+	
+	A tame kangaroo starts from g^((a+b)/2), a wild one from h, both jump by g^s with s a power of 2
+	chosen by x (mean jump sqrt(b-a)/2) and store their distinguished points. The tame one lands
+	on the trail of the wild one (or the reverse) after about 2*sqrt(b-a) jumps in total.
+	"""
+	
+	if(a > b):
+		raise ValueError("empty interval ["+str(a)+", "+str(b)+"]")
+	w = b - a
+	h %= n
+	m = max(1, itools.isqrt(w)//2)
+	sizes, jumps = _kangaroo_jumps(g, n, m)
+	k = len(sizes)
+	mask = _dp_mask(itools.isqrt(w))
+	limit = 8*w + 8*m
+	#distances : exponent of g for the tame kangaroo, log(x) - log(h) for the wild one
+	D = [a + w//2, 0]
+	X = [itools.exp_mod(g, D[0], n), h]
+	traps = {}
+	herd = 0
+	if(verbose): print("kangaroo : interval of 2^"+str(w.bit_length()),", mean jump",m,", mask",mask)
+	while(D[1] <= limit):
+		x, d = X[herd], D[herd]
+		while(True):
+			i = x % k
+			x = (x*jumps[i]) % n
+			d += sizes[i]
+			if(not x & mask):
+				break
+		X[herd], D[herd] = x, d
+		if(x in traps and traps[x][0] != herd):
+			t = d if(herd == 0) else traps[x][1]
+			u = d if(herd == 1) else traps[x][1]
+			y = t - u if(p is None) else (t - u) % p
+			if(verbose): print("kangaroo :\n[",y,"]",g,"=",h)
+			return y
+		traps[x] = (herd, d)
+		herd ^= 1
+	raise ValueError("the log of "+str(h)+" isn't in ["+str(a)+", "+str(b)+"]")
+
+#g,p,q,k = itools.schnorr_group(itools.rand_prime_bits(160), 512)
+#kangaroo(g, itools.exp_mod(g, 2**39 + 12345, p), 2**39, 2**40, p, q, verbose=True)
+
+#sub-function for the parallel kangaroo : one tame and one wild kangaroo, their distinguished points go to the parent.
+#inbox receives (herd, generation) when a kangaroo fell on the trail of its own herd : it restarts.
+def sub_kangaroo(g, h, n, start, spread, sizes, jumps, mask, seed, worker, output_queue, inbox):
+	rng = random.Random(seed)
+	k = len(sizes)
+	D = [start + rng.randrange(spread), rng.randrange(spread)]
+	X = [itools.exp_mod(g, D[0], n), (h*itools.exp_mod(g, D[1], n)) % n]
+	generation = [0, 0]
+	herd = 0
+	while(True):
+		x, d = X[herd], D[herd]
+		while(True):
+			i = x % k
+			x = (x*jumps[i]) % n
+			d += sizes[i]
+			if(not x & mask):
+				break
+		X[herd], D[herd] = x, d
+		output_queue.put((worker, herd, generation[herd], x, d))
+		try:
+			while(True):
+				r, gen = inbox.get_nowait()
+				if(gen == generation[r]):
+					generation[r] += 1
+					D[r] = (start if(r == 0) else 0) + rng.randrange(spread)
+					X[r] = itools.exp_mod(g, D[r], n)
+					if(r == 1):
+						X[r] = (X[r]*h) % n
+		except Empty:
+			pass
+		herd ^= 1
+
+
+def kangaroo_par(g, h, a, b, n, p=None, jobs=8, verbose=False):
+	"""Parallel kangaroo method (van Oorschot-Wiener) applied to DLP, when the logarithm is known to lie in [a, b].
+	
+	Args:
+		- *g (int)*: a generator
+		- *h (int)*: an integer g^x with a <= x <= b
+		- *a (int)*: lower bound of the interval
+		- *b (int)*: upper bound of the interval
+		- *n (int)*: the modulo
+		
+	Optional args:
+		- *p (int)*: the order of <g>, if known (the result is then reduced modulo p).
+		- *jobs (int)*: number of processes to launch, each one runs a tame and a wild kangaroo.
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int)*: x such that [x]g = h mod n. Raises ValueError if the log isn't in [a, b].
+	
+	The mean jump is jobs*sqrt(b-a)/2, so the herds of 2*jobs kangaroos need about 2*sqrt(b-a)/jobs jumps each.
+	The parent stores every distinguished point : a tame/wild collision gives the log, a collision inside
+	a herd restarts the second kangaroo from a random point. Small intervals are solved by :func:`kangaroo`.
+	"""
+	
+	if(a > b):
+		raise ValueError("empty interval ["+str(a)+", "+str(b)+"]")
+	w = b - a
+	if(w < 2**24):
+		return kangaroo(g, h, a, b, n, p, verbose)
+	h %= n
+	m = max(1, jobs*itools.isqrt(w)//2)
+	sizes, jumps = _kangaroo_jumps(g, n, m)
+	mask = _dp_mask(2*itools.isqrt(w)//jobs)
+	limit = 8*w + 8*m
+	if(verbose): print("kangaroo_par : interval of 2^"+str(w.bit_length()),",",2*jobs,"kangaroos, mean jump",m,", mask",mask)
+	
+	def core(worker, seed, output_queue, inbox): sub_kangaroo(g, h, n, a + w//2, m, sizes, jumps, mask, seed, worker, output_queue, inbox)
+	queue = Queue()
+	inboxes = [Queue() for j in range(jobs)]
+	procs = []
+	for j in range(jobs):
+		procs.append(Process(target=core, args=(j, random.getrandbits(64), queue, inboxes[j])))
+	for proc in procs:
+		proc.start()
+	traps = {}
+	y = None
+	while(y is None):
+		worker, herd, gen, x, d = queue.get()
+		if(herd == 1 and d > limit):
+			break
+		if(x in traps):
+			herd2, d2, worker2, gen2 = traps[x]
+			if(herd2 != herd):
+				t, u = (d, d2) if(herd == 0) else (d2, d)
+				y = t - u if(p is None) else (t - u) % p
+				continue
+			if((worker2, gen2) != (worker, gen)):
+				inboxes[worker].put((herd, gen))
+				continue
+		traps[x] = (herd, d, worker, gen)
+	for proc in procs:
+		proc.terminate()
+	if(y is None):
+		raise ValueError("the log of "+str(h)+" isn't in ["+str(a)+", "+str(b)+"]")
+	if(verbose): print("kangaroo_par :\n[",y,"]",g,"=",h,"(",len(traps),"distinguished points )")
+	return y
+
+#g,p,q,k = itools.schnorr_group(itools.rand_prime_bits(160), 512)
+#kangaroo_par(g, itools.exp_mod(g, 2**47 + 12345, p), 2**47, 2**48, p, q, 8, verbose=True)
+
+
+#factor base bound of the index calculus, by bit length of the modulo
+_IC_BOUNDS = [(64, 2**11), (80, 2**13), (96, 2**14), (112, 2**15), (128, 2**16)]
+
+#x = prod fb[i]^e : {i : e} (x smooth)
+def _ic_factor(x, fb):
+	exps = {}
+	for i, p in enumerate(fb):
+		if(x == 1):
+			break
+		while(x % p == 0):
+			x //= p
+			exps[i] = exps.get(i, 0) + 1
+	return exps
+
+
+#batches of relations g^e = a/b mod n with a and b smooth : lists of (e, {i : coefficient})
+def _ic_relations(g, q, n, fb, P, batch, seed):
+	rand = random.Random(seed)
+	s = itools.isqrt(n)
+	while(True):
+		#consecutive exponents : one multiplication per candidate
+		e0 = rand.randrange(1, q)
+		z = itools.exp_mod(g, e0, n)
+		E, AB = [], []
+		for e in range(e0, e0+batch):
+			E.append(e % q)
+			AB.append(itools.rational_reconstruction(z, n, s))
+			z = z*g % n
+		L = [abs(a*b) for a, b in AB]
+		rels = []
+		for e, (a, b), x, sp in zip(E, AB, L, itools.smooth_parts(L, P)):
+			if(x == sp and a != 0):
+				row = _ic_factor(abs(a), fb)
+				for i, c in _ic_factor(b, fb).items():
+					row[i] = row.get(i, 0) - c
+				rels.append((e, row))
+		yield batch, rels
+
+
+#sparse Gaussian elimination mod q (prime), Markowitz pivoting : {column : value} for the determined columns
+def _ic_solve(rows, rhs, q):
+	R = {}
+	V = {}
+	cols = {}
+	for i, (row, v) in enumerate(zip(rows, rhs)):
+		R[i] = {c : x % q for c, x in row.items() if x % q}
+		V[i] = v % q
+		for c in R[i]:
+			cols.setdefault(c, set()).add(i)
+	heap = [(len(rs), c) for c, rs in cols.items()]
+	heapq.heapify(heap)
+	pivots = []
+	while(heap):
+		w, c = heapq.heappop(heap)
+		if(c not in cols or len(cols[c]) != w):
+			continue
+		if(w == 0):
+			del cols[c]
+			continue
+		i = min(cols[c], key=lambda i: len(R[i]))
+		row, v = R.pop(i), V.pop(i)
+		inv = pow(row[c], q-2, q)
+		row = {d : x*inv % q for d, x in row.items()}
+		v = v*inv % q
+		for d in row:
+			cols[d].discard(i)
+		for j in list(cols[c]):
+			rj = R[j]
+			f = rj[c]
+			for d, x in row.items():
+				y = (rj.get(d, 0) - f*x) % q
+				if(y):
+					if(d not in rj):
+						cols[d].add(j)
+					rj[d] = y
+				elif(d in rj):
+					del rj[d]
+					cols[d].discard(j)
+			V[j] = (V[j] - f*v) % q
+		for d in row:
+			if(d != c):
+				heapq.heappush(heap, (len(cols[d]), d))
+		del cols[c]
+		pivots.append((c, row, v))
+	logs = {}
+	for c, row, v in reversed(pivots):
+		s = v
+		for d, x in row.items():
+			if(d != c):
+				if(d not in logs):
+					break
+				s -= x*logs[d]
+		else:
+			logs[c] = s % q
+	return logs
+
 
-def pohlig_hellman(g, h, n, log_file, verbose=False):
+class IndexCalculus(object):
+	"""Index calculus in the subgroup of prime order q of Z/nZ*.
+	
+	Args:
+		- *g (int)*: a generator of the subgroup
+		- *q (int)*: its order, an odd prime such that q^2 doesn't divide n-1
+		- *n (int)*: the modulo, a prime integer
+		
+	Optional args:
+		- *B (int)*: the factor base bound, chosen from the size of n if omitted.
+		- *jobs (int)*: number of processes collecting relations (1 : no process).
+		- *verbose (bool)*: set to True if you want a display.
+	
+	The logs are "virtual" logs mod q : log(x) = L(x)/L(g) mod q for the log L to any generator of Z/nZ*,
+	so that every prime has one and -1 has log 0. Relations g^e = a/b mod n with a, b < sqrt(n) (rational
+	reconstruction) are kept when a*b is smooth (batch test, :func:`itools.smooth_parts`), and the logs of the
+	factor base come from a sparse elimination mod q. They are then shared by all the calls to :meth:`log`.
+	"""
+	
+	def __init__(self, g, q, n, B=None, jobs=8, verbose=False):
+		if(((n-1)//q) % q == 0):
+			raise ValueError("q^2 divides n-1 : no index calculus in this subgroup")
+		self.g, self.q, self.n = g, q, n
+		if(B is None):
+			B = next((B for bits, B in _IC_BOUNDS if n.bit_length() <= bits), _IC_BOUNDS[-1][1])
+		self.B = B
+		self.fb = itools.get_primes(2, B)
+		self.P = 1
+		for p in self.fb:
+			self.P *= p
+		self.G = itools.FixedBase(g, n, q.bit_length())
+		t0 = time.monotonic()
+		needed = len(self.fb) + len(self.fb)//10 + 10
+		if(verbose): print("index calculus : factor base of",len(self.fb),"primes below",B,",",needed,"relations needed")
+		rows, rhs = [], []
+		seen = set()
+		tested = 0
+		if(jobs <= 1):
+			source = _ic_relations(g, q, n, self.fb, self.P, 256, random.getrandbits(64))
+			procs = []
+		else:
+			def core(seed, output_queue):
+				for item in _ic_relations(g, q, n, self.fb, self.P, 256, seed):
+					output_queue.put(item)
+			queue = Queue()
+			procs = [Process(target=core, args=(random.getrandbits(64), queue)) for j in range(jobs)]
+			for p in procs:
+				p.start()
+			source = iter(queue.get, None)
+		try:
+			for count, rels in source:
+				tested += count
+				for e, row in rels:
+					if(e not in seen):
+						seen.add(e)
+						rows.append(row)
+						rhs.append(e)
+				if(len(rows) >= needed):
+					break
+		finally:
+			for p in procs:
+				p.terminate()
+		if(verbose): print("index calculus :",len(rows),"relations from",tested,"candidates in {0:.1f} s, linear algebra..".format(time.monotonic()-t0))
+		logs = _ic_solve(rows, rhs, q)
+		self.logs = {self.fb[i] : x for i, x in logs.items()}
+		if(verbose): print("index calculus :",len(self.logs),"logs known in {0:.1f} s".format(time.monotonic()-t0))
+	
+	#a = prod of known primes times at most one prime < B^2 : (list of (prime, exponent), large prime or 1), None otherwise
+	def _split(self, a, smooth):
+		r = a // smooth
+		if(r != 1 and (r >= self.B*self.B or r in self.logs)):
+			return None
+		factors = []
+		for i, e in _ic_factor(smooth, self.fb).items():
+			if(self.fb[i] not in self.logs):
+				return None
+			factors.append((self.fb[i], e))
+		return factors, r
+	
+	#log of z*g^e = a/b for random e, with a and b products of known logs and of large primes (descent)
+	def _descend(self, z, large=True, batch=64):
+		q, n = self.q, self.n
+		s = itools.isqrt(n)
+		while(True):
+			E = [random.randrange(q) for _ in range(batch)]
+			AB = [itools.rational_reconstruction(z*self.G.pow(e), n, s) for e in E]
+			L = [abs(x) for a, b in AB for x in (a, b)]
+			S = itools.smooth_parts(L, self.P)
+			for k, e in enumerate(E):
+				a, b = L[2*k], L[2*k+1]
+				if(a == 0):
+					continue
+				sa, sb = self._split(a, S[2*k]), self._split(b, S[2*k+1])
+				if(sa is None or sb is None or (not large and (sa[1] != 1 or sb[1] != 1))):
+					continue
+				x = -e
+				for (factors, r), sign in ((sa, 1), (sb, -1)):
+					for p, c in factors:
+						x += sign*c*self.logs[p]
+					if(r != 1):
+						#one level of descent : r*g^e' is smooth over the known logs
+						self.logs[r] = self._descend(r, False)
+						x += sign*self.logs[r]
+				return x % q
+	
+	def log(self, h):
+		"""Individual logarithm.
+		
+		Args:
+			- *h (int)*: an element of the subgroup
+			
+		Returns:
+			- *(int)*: x such that g^x = h mod n.
+		
+		h*g^e = a/b mod n is searched for random e, where a and b factor over the known logs with at most
+		one prime between B and B^2 each. The log of such a prime r is found the same way from r*g^e'.
+		"""
+		
+		if(h % self.n == 1):
+			return 0
+		return self._descend(h)
+
+
+def index_calculus(g, h, q, n, B=None, jobs=8, verbose=False):
+	"""Index calculus applied to DLP in a subgroup of prime order.
+	
+	Args:
+		- *g (int)*: a generator of the subgroup
+		- *h (int)*: an integer in <g>
+		- *q (int)*: the order of <g>, an odd prime such that q^2 doesn't divide n-1
+		- *n (int)*: the modulo, a prime integer
+		
+	Optional args:
+		- *B (int)*: the factor base bound, see :class:`IndexCalculus`.
+		- *jobs (int)*: number of processes collecting relations.
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int)*: x such that [x]g = h mod n
+	
+	Subexponential : better than the rho methods when q is large, with n up to about 120 bits.
+	Use :class:`IndexCalculus` directly to compute many logs in the same group.
+	"""
+	
+	x = IndexCalculus(g, q, n, B, jobs, verbose).log(h)
+	if(verbose): print("index_calculus :\n[",x,"]",g,"=",h)
+	return x
+
+#g,p,q,k = itools.schnorr_group(itools.rand_prime_bits(60), 80)
+#index_calculus(g, itools.exp_mod(g, random.randrange(q), p), q, p, jobs=8, verbose=True)
+
+
+def pohlig_hellman(g, h, n, log_file, verbose=False, ic_bound=0, bsgs_bound=2**40, memory=2**27, checkpoint=None):
 	"""Pohlig-Hellman's algorithm to solve DLP.
 
 	Args:
@@ -295,6 +1170,10 @@ def pohlig_hellman(g, h, n, log_file, verbose=False):
 		
 	Optional args:
 		- *verbose (bool)*: set to True if you want a display.
+		- *ic_bound (int)*: the prime factors of n-1 above this bound (with exponent 1) are solved by index calculus (0 : never).
+		- *bsgs_bound (int)*: the prime factors of n-1 below this bound are solved by baby-step giant-step.
+		- *memory (int)*: memory budget of the baby-step tables in bytes, see :class:`BSGSTable`.
+		- *checkpoint (str)*: a directory where the solved digits and the rho attacks are saved, and resumed from.
 		
 	Returns:
 		- *(int)*: x such that [x mod n-1]g = h mod n
@@ -303,35 +1182,95 @@ def pohlig_hellman(g, h, n, log_file, verbose=False):
 	and then reconstructs the result with the CRT.
 	"""
 	
+	x = pohlig_hellman_batch(g, [h], n, log_file, verbose, ic_bound, bsgs_bound, memory, checkpoint)[0]
+	if(verbose): print("pohlig_hellman :\n[",x,"]",g,"=",itools.exp_mod(g,x,n))
+	return x
+
+
+def pohlig_hellman_batch(g, Lh, n, log_file, verbose=False, ic_bound=0, bsgs_bound=2**40, memory=2**27, checkpoint=None):
+	"""Pohlig-Hellman's algorithm for many targets in the same group.
+
+	Args:
+		- *g (int)*: a generator
+		- *Lh (List)*: a list of integers in <g>
+		- *n (int)*: the modulo
+		- *log_file (File)*: an opened file in which results will be written
+		
+	Optional args:
+		- *verbose (bool)*: set to True if you want a display.
+		- *ic_bound (int)*: see :func:`pohlig_hellman`.
+		- *bsgs_bound (int)*: see :func:`pohlig_hellman`.
+		- *memory (int)*: see :func:`pohlig_hellman`.
+		- *checkpoint (str)*: see :func:`pohlig_hellman`.
+		
+	Returns:
+		- *(List)*: the list of the x such that [x mod n-1]g = Lh[i] mod n
+	
+	n-1 is factored once, the tables of g and 1/g and the CRT context are shared by all the targets,
+	and so are the logs of the factor base when a factor is solved by index calculus, and the baby steps
+	when it is solved by BSGS (one table for all the digits of all the targets).
+	
+	The checkpoint directory holds the digits already solved ("pohlig_hellman", rewritten after each digit)
+	and one directory per rho attack (see :func:`rho_pollard_dlp_par`) : a resumed run skips the solved
+	digits and resumes the rho attack that was running.
+	"""
 	
 	p = n-1
 	if(verbose):print("\n==== POHLIG_HELLMAN ====")
 	facteurs = pyfacto.easy_facto(n-1,verbose)
-	La = []
-	Ln = []
-	for pi in facteurs.keys():
+	#g and 1/g are raised to many exponents < p
+	G = itools.FixedBase(g,n,p.bit_length(),order=p)
+	B = itools.FixedBase(itools.inversion_modulaire(g,n),n,p.bit_length(),order=p)
+	primes = list(facteurs.keys())
+	ctx = itools.CRTContext([pi**facteurs[pi] for pi in primes])
+	residues = [[] for h in Lh]
+	#digits[str(t)+" "+str(pi)] : the digits of the log of Lh[t] in base pi already solved
+	state = {"g": g, "n": n, "targets": [h % n for h in Lh], "digits": {}}
+	if(checkpoint is not None):
+		os.makedirs(checkpoint, exist_ok=True)
+		saved = _load_json(os.path.join(checkpoint, "pohlig_hellman"))
+		if(saved is not None):
+			if([saved["g"], saved["n"], saved["targets"]] != [state["g"], state["n"], state["targets"]]):
+				raise ValueError("the checkpoint "+checkpoint+" is for another DLP")
+			state = saved
+	digits = state["digits"]
+	for pi in primes:
 		if(verbose):print("\n=================\nFactor :",pi,"\n=================")
 		ei = facteurs[pi]
-		xi = 0
-		y = h
-		b = itools.inversion_modulaire(g,n)
-		q = p//pi
-		gi = itools.exp_mod(g,q,n)
-		for i in range(ei):
-			w = itools.exp_mod(y,q,n)
-			t0 = time.monotonic()
-			xj = rho_pollard_dlp_par(gi, w, pi, n, pi, 50, 8, verbose)
-			t1 = time.monotonic()
-			log_file.write(str(t1-t0) + " s\n")
-			print(t1-t0, "s")
-			xi += xj*(pi**i)
-			y = (y*itools.exp_mod(b,xj,n)) % n
-			b = itools.exp_mod(b,pi,n)
-			q = q//pi
-		La.append(xi)
-		Ln.append(pi**ei)
-	x = itools.crt(La,Ln,p)
-	if(verbose): print("pohlig_hellman :\n[",x,"]",g,"=",itools.exp_mod(g,x,n))
-	return x
+		gi = G.pow(p//pi)
+		todo = any(len(digits.get(str(t)+" "+str(pi), [])) < ei for t in range(len(Lh)))
+		IC = IndexCalculus(gi, pi, n, None, 8, verbose) if(todo and ic_bound and pi > ic_bound and ei == 1) else None
+		T = BSGSTable(gi, pi, n, memory) if(todo and IC is None and pi < bsgs_bound) else None
+		for t in range(len(Lh)):
+			h = Lh[t]
+			xi = 0
+			y = h
+			q = p//pi
+			solved = digits.setdefault(str(t)+" "+str(pi), [])
+			for i in range(ei):
+				if(i < len(solved)):
+					xj = solved[i]
+				else:
+					w = itools.exp_mod(y,q,n)
+					t0 = time.monotonic()
+					if(IC is not None):
+						xj = IC.log(w)
+					elif(T is not None):
+						xj = T.log(w)
+					else:
+						rho = None if(checkpoint is None) else os.path.join(checkpoint, "rho_"+str(pi)+"_"+str(t)+"_"+str(i))
+						xj = rho_pollard_dlp_par(gi, w, pi, n, pi, 50, 8, verbose, None, rho)
+					t1 = time.monotonic()
+					log_file.write(str(t1-t0) + " s\n")
+					print(t1-t0, "s")
+					solved.append(xj)
+					if(checkpoint is not None):
+						_save_json(os.path.join(checkpoint, "pohlig_hellman"), state)
+				xi += xj*(pi**i)
+				#y = h/g^xi
+				y = (h*B.pow(xi)) % n
+				q = q//pi
+			residues[t].append(xi)
+	return ctx.reconstruct_many(residues)
 
 
@@ -365,6 +365,62 @@ def weger_ex(n,e,B,jobs=8,verbose=False):
 	if(verbose): print("\nweger extended failed :(\n")
 
 	
+def batch_gcd(moduli, jobs=8, spill=None, verbose=False):
+	"""Bernstein's batch GCD : finds the moduli of a corpus which share a prime with another one.
+	
+	Args:
+		- *moduli (List)*: a list of RSA moduli
+		
+	Optional Args:
+		- *jobs (int)*: number of processes used to compute each level of the trees (1 : no process).
+		- *spill (str)*: a directory where the levels of the product tree are stored instead of RAM.
+		- *verbose (bool)*: set to True to get a display.
+		
+	Returns:
+		- *(List)*: a list of tuples (i, n, g), one for each modulus n = moduli[i] such that
+					g = gcd(n, product of the others) > 1.
+					g = n when both primes are shared (duplicate moduli...) and no pair splits n.
+	
+	Computes P = product of the moduli with a product tree, then P mod n^2 for every n with a
+	remainder tree : gcd((P mod n^2)/n, n) = gcd(n, P/n). Quasi-linear instead of O(N^2) pairwise gcds.
+	"""
+	
+	pool = Pool(processes=jobs) if jobs > 1 else None
+	tree = None
+	try:
+		if(verbose): print("batch_gcd : product tree of", len(moduli), "moduli")
+		tree = itools.ProductTree(moduli, pool, spill)
+		if(verbose): print("batch_gcd : remainder tree")
+		rems = itools.remainder_tree(tree, tree.root, True, pool)
+	finally:
+		if(tree is not None):
+			tree.close()
+		if(pool is not None):
+			pool.terminate()
+	found = []
+	for i in range(len(moduli)):
+		n = moduli[i]
+		g = math.gcd(rems[i]//n, n)
+		if(g > 1):
+			found.append([i, n, g])
+	#n divides the product of the others : try to split it with the other weak moduli
+	for f in found:
+		if(f[2] == f[1]):
+			for i, n, g in found:
+				d = math.gcd(f[1], n)
+				if(1 < d < f[1]):
+					f[2] = d
+					break
+	found = [tuple(f) for f in found]
+	if(verbose): print("batch_gcd :", len(found), "weak moduli")
+	return found
+
+#p = itools.rand_prime(2**511,2**512,20)
+#L = [itools.rand_prime(2**511,2**512,20)*itools.rand_prime(2**511,2**512,20) for _ in range(1000)]
+#L += [p*itools.rand_prime(2**511,2**512,20), p*itools.rand_prime(2**511,2**512,20)]
+#print(batch_gcd(L, 8, None, True))
+
+
 #instances aléatoires dont la taille fait que Wiener et Weger échouent alors que Weger étendue fonctionne (la plupart du temps)
 
 #q = itools.rand_prime(100000000000,200000000000,20)
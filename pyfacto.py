@@ -33,11 +33,13 @@ __status__ = "Beta"
 .. moduleauthor:: Amaury Behague <amaury.behague@gmail.com>
 """
 
-import itools, random, time
+import gf2, itools, math, random, time
 from multiprocessing import Process, Queue
 
 random.seed()
 
+_TRIAL_PRIMES = itools.small_primes(1000)
+
 
 def facto_fermat(n, verbose=False):
 	"""Fermat's factoring algorithm.
@@ -440,56 +442,588 @@ def pp1_williams_auto(n,Bmax,verbose=False):
 #pm1_pollard_auto(n,1024000,True)
 #pp1_williams_auto(n,1000000,True)
 
-def edwards_add(P1,P2,Edwards):
-	x1,y1 = P1
-	x2,y2 = P2
-	a,d,n = Edwards
-	x1y1 = (x1*y1)%n
-	x2y2 = (x2*y2)%n
-	p = ( x1y1 + x2y2 ) % n
-	q = ( (y1*y2 % n) + (a*x1*x2 % n) ) % n
-	x = p//q
-	y=-1
-	p = ( x1y1 - x2y2 + n) % n
-	q = ( (x1*y2 % n) - (y1*x2 % n) + n) % n
-	if(q==0): print("edwards_add ERROR : division par 0")
-	else: y = p//q
-	return (x,y)
-
-def edwards_double(P1,Edwards):
-	x,y = P
-	a,d,n = Edwards
-	xy = (x*y)%n
-	x2 = (x*x)%n
-	y2 = (y*y)%n
-	return ( ((2*xy)%n) // ((1 + d*((xy*xy)%n))%n) ), ( ((y2 - a*x2)%n) // ((n+1 - d*((xy*xy)%n))%n) )  
-	
-#retourne un facteur de n
-#algorithme le plus efficace pour trouver des facteurs de moins de 25 chiffres
-#version avec courbes de d'Edwards (plus rapide que les courbes de Montgomery)
-#E(a,d) : ax² + y² = 1 + dx²y²  (a et d non nuls)
-#On considère le cas où a = 1 et d != 0,1
-#TODO
-def eecm(n):
-	u = random.randint(2,n-1)
-	u2 = (u*u)%n
-	u2p1 = (u*u+1)%n
-	x = ((u2-1)%n)//u2p1
-	y = (((u-1)*(u-1))%n)//u2p1
-	d1 = ( ((u2p1*u2p1)%n)*(u2p1) ) % n
-	d1 = ( d1*(u2-4*u+1) ) % n
-	d2 = ( (u-1)*(u-1) ) % n
-	d2 = ( ((d2*d2)%n)*d2 ) % n
-	d2 = (d2 * ((u+1)*(u+1))%n ) % n
-	d = d1 // d2
-	
-
-	
-#TODO : version avec Courbes d'Edward
-
-
-#TODO : Multiple Polynomial Quadratic Sieve (MPQS) => cf COURS CRYPTO (GNFS trop compliqué)
+#Montgomery curves By² = x³ + Ax² + x in X:Z coordinates (no inversion), a24 = (A+2)/4 mod n
+
+#[2]P
+def _xdbl(P, a24, n):
+	X, Z = P
+	s = (X+Z)*(X+Z) % n
+	d = (X-Z)*(X-Z) % n
+	t = s - d
+	return s*d % n, t*(d + a24*t) % n
+
+#P+Q, knowing P-Q
+def _xadd(P, Q, diff, n):
+	u = (P[0]-P[1])*(Q[0]+Q[1]) % n
+	v = (P[0]+P[1])*(Q[0]-Q[1]) % n
+	return diff[1]*(u+v)*(u+v) % n, diff[0]*(u-v)*(u-v) % n
+
+#[k]P with Montgomery's ladder (k >= 1)
+def _xmul(k, P, a24, n):
+	R0, R1 = P, _xdbl(P, a24, n)
+	for bit in bin(k)[3:]:
+		if(bit == '1'):
+			R0, R1 = _xadd(R0, R1, P, n), _xdbl(R1, a24, n)
+		else:
+			R0, R1 = _xdbl(R0, a24, n), _xadd(R0, R1, P, n)
+	return R0
+
+
+def ecm_scalar(B1):
+	"""Stage 1 scalar of ECM.
+	
+	Args:
+		- *B1 (int)*: the stage 1 bound
+		
+	Returns:
+		- *(int)*: the product of the largest powers q^e <= B1 of the primes q <= B1 (about 1.44*B1 bits).
+	"""
+	
+	k = 1
+	for q in itools.iter_primes(2, B1+1):
+		qe = q
+		while(qe*q <= B1):
+			qe *= q
+		k *= qe
+	return k
+
+
+def ecm_stage2_plan(B1, B2):
+	"""Baby-step/giant-step plan of ECM's stage 2 : every prime B1 < p <= B2 is written p = m*D +- j.
+	
+	Args:
+		- *B1 (int)*: the stage 1 bound
+		- *B2 (int)*: the stage 2 bound
+		
+	Returns:
+		- *(int,List,List)*: D, the baby steps j (odd, coprime to D, < D/2) and the list of (m, [indices of j]) in increasing m.
+		  None if B1 <= 3 (no stage 2).
+	
+	D is the largest of 2310, 210, 30, 6 below 2*B1, so that m >= 1.
+	"""
+	
+	D = next((D for D in (2310, 210, 30, 6) if D < 2*B1), None)
+	if(D is None):
+		return None
+	babies = [j for j in range(1, D//2, 2) if math.gcd(j, D) == 1]
+	index = {j : i for i, j in enumerate(babies)}
+	plan = []
+	for p in itools.iter_primes(B1+1, B2+1):
+		m = (p + D//2)//D
+		if(not plan or plan[-1][0] != m):
+			plan.append((m, []))
+		plan[-1][1].append(index[abs(p - m*D)])
+	return D, babies, plan
+
+
+def ecm_curve(n, sigma, k, stage2=None):
+	"""Runs one curve of ECM (Suyama's parametrization).
+	
+	Args:
+		- *n (int)*: an integer (no small factor)
+		- *sigma (int)*: the curve parameter, 5 < sigma < n-1
+		- *k (int)*: the stage 1 scalar, see :func:`ecm_scalar`
+		
+	Optional Args:
+		- *stage2 (tuple)*: the stage 2 plan, see :func:`ecm_stage2_plan`. No stage 2 if omitted.
+		
+	Returns:
+		- *(int)*: a factor of n, 1 or n if the curve failed.
+	
+	Stage 1 computes [k]P with Montgomery's ladder. Stage 2 walks the giant steps [m*D]P and multiplies
+	X(mD)*Z(j) - X(j)*Z(mD) for every prime m*D +- j : one multiplication per prime.
+	"""
+	
+	u = (sigma*sigma - 5) % n
+	v = 4*sigma % n
+	den = 16*u*u*u*v % n
+	g = itools.gcd(den, n)
+	if(g != 1):
+		return g
+	a24 = pow(v-u, 3, n)*(3*u+v)*itools.inversion_modulaire(den, n) % n
+	Q = _xmul(k, (u*u*u % n, v*v*v % n), a24, n)
+	g = itools.gcd(Q[1], n)
+	if(g != 1 or stage2 is None or not stage2[2]):
+		return g
+	
+	D, babies, plan = stage2
+	#baby steps [j]Q, j odd
+	Q2 = _xdbl(Q, a24, n)
+	coprimes = set(babies)
+	B = [Q]
+	prev, cur = Q, _xadd(Q2, Q, Q, n)
+	for j in range(3, D//2, 2):
+		if(j in coprimes):
+			B.append(cur)
+		prev, cur = cur, _xadd(cur, Q2, prev, n)
+	B = [(X, Z, X*Z % n) for X, Z in B]
+	#giant steps [m*D]Q
+	RD = _xmul(D, Q, a24, n)
+	m = plan[0][0]
+	R = _xmul(m*D, Q, a24, n)
+	Rnext = _xadd(R, RD, _xmul((m-1)*D, Q, a24, n), n) if m > 1 else _xdbl(RD, a24, n)
+	acc = 1
+	for t, (mi, js) in enumerate(plan):
+		while(m < mi):
+			R, Rnext = Rnext, _xadd(Rnext, RD, R, n)
+			m += 1
+		X, Z = R
+		XZ = X*Z % n
+		for i in js:
+			Xj, Zj, XZj = B[i]
+			acc = acc * ((X - Xj)*(Z + Zj) - XZ + XZj) % n
+		if(t % 256 == 255):
+			g = itools.gcd(acc, n)
+			if(g != 1):
+				return g
+	return itools.gcd(acc, n)
+
+
+#runs curves with sigma drawn from seed, until a factor is found : the factor or 0
+def _ecm_curves(n, curves, seed, k, stage2):
+	rand = random.Random(seed)
+	for c in range(curves):
+		g = ecm_curve(n, rand.randint(6, n-2), k, stage2)
+		if(g != 1 and g != n):
+			return g
+	return 0
+
+
+def ecm(n, B1=11000, B2=None, curves=100, jobs=8, verbose=False):
+	"""Lenstra's elliptic curve factoring method, with Montgomery curves.
+	
+	Args:
+		- *n (int)*: a non-prime integer
+		
+	Optional Args:
+		- *B1 (int)*: stage 1 bound
+		- *B2 (int)*: stage 2 bound, 100*B1 if omitted (no stage 2 if B2 <= B1).
+		- *curves (int)*: number of curves to try.
+		- *jobs (int)*: number of processes to launch, the curves are shared between them (1 : no process).
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int)*: a non-trivial factor of n, 0 if attack failed.
+	
+	The stage 1 scalar and the stage 2 plan are computed once for all the curves.
+	All the processes are stopped as soon as one of them finds a factor.
+	"""
+	
+	if(B2 is None):
+		B2 = 100*B1
+	k = ecm_scalar(B1)
+	stage2 = ecm_stage2_plan(B1, B2) if B2 > B1 else None
+	if(jobs <= 1):
+		g = _ecm_curves(n, curves, random.getrandbits(64), k, stage2)
+	else:
+		def core(n, curves, seed, k, stage2, output_queue): output_queue.put(_ecm_curves(n, curves, seed, k, stage2))
+		queue = Queue()
+		procs = []
+		for j in range(jobs):
+			procs.append(Process(target=core, args=(n, -(-curves//jobs), random.getrandbits(64), k, stage2, queue)))
+		for p in procs:
+			p.start()
+		for j in range(jobs):
+			g = queue.get()
+			if(g != 0):
+				break
+		for p in procs:
+			p.terminate()
+	if(g != 0):
+		if(verbose): print("ecm ( B1 =",B1,", B2 =",B2,") :\n",n,"=",g,"x",n//g)
+		return g
+	if(verbose): print("ecm failed with", curves, "curves, B1 =", B1, ":(")
+	return 0
+
+#n = itools.rand_prime(2**80,2**81)*itools.rand_prime(2**200,2**201)
+#ecm(n,50000,curves=300,jobs=8,verbose=True)
+
+
+#(digits of the factor, B1, number of curves), from GMP-ECM's recommended parameters
+_ECM_PARAMETERS = [
+	(15, 2000, 25),
+	(20, 11000, 90),
+	(25, 50000, 300),
+	(30, 250000, 700),
+	(35, 1000000, 1800),
+	(40, 3000000, 5100),
+]
+
+def ecm_auto(n, digits=40, jobs=8, verbose=False):
+	"""ECM with increasing bounds, tuned for factors of 15, 20, 25... digits.
+	
+	Args:
+		- *n (int)*: a non-prime integer
+		
+	Optional Args:
+		- *digits (int)*: size of the largest factor looked for (40 max).
+		- *jobs (int)*: number of processes to launch.
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(int)*: a non-trivial factor of n, 0 if attack failed.
+	"""
+	
+	for d, B1, curves in _ECM_PARAMETERS:
+		if(d > max(digits, 15)):
+			break
+		if(verbose): print("ecm_auto : looking for factors of",d,"digits")
+		g = ecm(n, B1, None, curves, jobs, verbose)
+		if(g != 0):
+			return g
+	if(verbose): print("ecm_auto failed with", digits, "digits :(")
+	return 0
+
+
 #MPQS : méthode la plus rapide pour trouver des facteurs entre 25 et 100 chiffres
+#Self-initialising quadratic sieve
+
+#(digits of n, size of the factor base, half-length M of the sieve interval)
+_SIQS_PARAMETERS = [
+	(20, 80, 8192),
+	(30, 150, 16384),
+	(40, 350, 32768),
+	(50, 900, 65536),
+	(60, 2000, 65536),
+	(70, 4000, 131072),
+	(80, 7500, 196608),
+	(90, 13000, 262144),
+]
+
+#primes below this bound are not sieved (trial division only)
+_SIQS_SMALL = 30
+
+#_SIQS_ADD[l] : translation table of a saturated byte addition of l, so that sieve[r::p].translate(_SIQS_ADD[l]) adds l to a whole progression
+_SIQS_ADD = [bytes(min(v + l, 255) for v in range(256)) for l in range(32)]
+
+
+#Knuth-Schroeppel : multiplier k maximizing the expected contribution of the small primes to k*n
+def _siqs_multiplier(n, primes):
+	best, kbest = None, 1
+	for k in (1, 2, 3, 5, 6, 7, 10, 11, 13, 14, 15, 17, 19, 21, 22, 23, 26, 29, 30, 31, 33, 34, 35, 37, 38, 39, 41, 42, 43):
+		kn = k*n
+		f = -0.5*math.log(k)
+		if(kn % 8 == 1):
+			f += 2*math.log(2)
+		elif(kn % 8 == 5):
+			f += math.log(2)
+		elif(kn % 4 == 3):
+			f += 0.5*math.log(2)
+		for p in primes[1:]:
+			if(kn % p == 0):
+				f += math.log(p)/p
+			elif(itools.jacobi(kn, p) == 1):
+				f += 2*math.log(p)/(p-1)
+		if(best is None or f > best):
+			best, kbest = f, k
+	return kbest
+
+
+def siqs_factor_base(n, size):
+	"""Factor base of the quadratic sieve.
+	
+	Args:
+		- *n (int)*: the integer to factor (k*n if a multiplier is used)
+		- *size (int)*: the number of primes
+		
+	Returns:
+		- *(List,List,List)*: the primes p such that n is a square mod p (2 and the divisors of n included),
+		  the square roots of n mod p and the rounded log2 of p.
+	"""
+	
+	fb = []
+	lo, hi = 2, 64*size
+	while(len(fb) < size):
+		fb += [p for p in itools.iter_primes(lo, hi) if p == 2 or n % p == 0 or itools.jacobi(n, p) == 1]
+		lo, hi = hi, 2*hi
+	fb = fb[:size]
+	return fb, [itools.sqrt_mod(n, p) for p in fb], [round(math.log2(p)) for p in fb]
+
+
+#indices in the factor base of the primes of a new coefficient A ~ target
+def _siqs_choose_a(fb, kn, target, rand):
+	first = next(i for i, p in enumerate(fb) if p > _SIQS_SMALL and kn % p != 0)
+	s = 1
+	while(target ** (1/s) > fb[-1] / 2):
+		s += 1
+	#the s-1 first primes around target^(1/s), the last one completes the product
+	centre = target ** (1/s)
+	pool = [i for i in range(first, len(fb)) if centre/2 <= fb[i] <= 2*centre and kn % fb[i] != 0]
+	if(len(pool) < s + 2):
+		pool = list(range(first, len(fb)))
+	qs = rand.sample(pool, s-1) if s > 1 else []
+	A = 1
+	for i in qs:
+		A *= fb[i]
+	rest = target / A
+	last = min((i for i in range(first, len(fb)) if i not in qs), key=lambda i: abs(fb[i] - rest))
+	qs.append(last)
+	return sorted(qs), A*fb[last]
+
+
+#relations found with one coefficient A : 2^(s-1) polynomials (A*x + b)^2 - kn = A*Q(x), x in [-M,M[
+#each relation (u, cols, large) : u^2 = (-1)^... * prod fb[c-1] * prod large mod n, column 0 is the sign
+def _siqs_sieve_a(n, kn, fb, tmem, logp, M, LP, double, rand):
+	F = len(fb)
+	target = itools.isqrt(2*kn) // M
+	qs, A = _siqs_choose_a(fb, kn, target, rand)
+	inA = set(qs)
+	Bs = []
+	for j in qs:
+		q = fb[j]
+		Aq = A // q
+		gamma = tmem[j] * itools.inversion_modulaire(Aq % q, q) % q
+		if(gamma > q//2):
+			gamma = q - gamma
+		Bs.append(Aq*gamma)
+	b = sum(Bs)
+	#sieved primes : not too small, not dividing A or k*n
+	sieved = [i for i in range(F) if fb[i] > _SIQS_SMALL and i not in inA and kn % fb[i] != 0]
+	ainv = {i : itools.inversion_modulaire(A % fb[i], fb[i]) for i in sieved}
+	sol1 = [ainv[i]*(tmem[i] - b) % fb[i] for i in sieved]
+	sol2 = [ainv[i]*(-tmem[i] - b) % fb[i] for i in sieved]
+	Bainv2 = [[2*Bj*ainv[i] % fb[i] for i in sieved] for Bj in Bs]
+	primes = [fb[i] for i in sieved]
+	tables = [_SIQS_ADD[logp[i]] for i in sieved]
+	#divided directly : primes of A, of k, and the small ones
+	direct = [i for i in range(F) if i not in sieved]
+	
+	#sieve threshold : log2 of the values of Q(x) minus the allowed large primes and the unsieved small primes
+	thresh = round(math.log2(M * math.sqrt(kn/2)) - (1.8 if double else 1.1)*math.log2(LP) - 4)
+	thresh = max(min(thresh, 255), 1)
+	marks = bytes(int(v >= thresh) for v in range(256))
+	
+	rels = []
+	npolys = 2**(len(qs)-1)
+	for i in range(npolys):
+		if(i > 0):
+			#Gray code : flip the sign of B[j]
+			j = (i & -i).bit_length()
+			Bj2 = 2*Bs[j]
+			if((i ^ (i >> 1)) >> (j-1) & 1):
+				b -= Bj2
+				sol1 = [(s + d) % p for s, d, p in zip(sol1, Bainv2[j], primes)]
+				sol2 = [(s + d) % p for s, d, p in zip(sol2, Bainv2[j], primes)]
+			else:
+				b += Bj2
+				sol1 = [(s - d) % p for s, d, p in zip(sol1, Bainv2[j], primes)]
+				sol2 = [(s - d) % p for s, d, p in zip(sol2, Bainv2[j], primes)]
+		c = (b*b - kn) // A
+		
+		sieve = bytearray(2*M)
+		R1 = [(s + M) % p for s, p in zip(sol1, primes)]
+		R2 = [(s + M) % p for s, p in zip(sol2, primes)]
+		for p, r1, r2, t in zip(primes, R1, R2, tables):
+			sieve[r1::p] = sieve[r1::p].translate(t)
+			if(r2 != r1):
+				sieve[r2::p] = sieve[r2::p].translate(t)
+		
+		flags = sieve.translate(marks)
+		pos = flags.find(1)
+		while(pos != -1):
+			x = pos - M
+			v = (A*x + 2*b)*x + c
+			cols = [j+1 for j in qs]
+			if(v < 0):
+				cols.append(0)
+				v = -v
+			for j in direct:
+				p = fb[j]
+				while(v % p == 0):
+					v //= p
+					cols.append(j+1)
+			for j, p, r1, r2 in zip(sieved, primes, R1, R2):
+				r = pos % p
+				if(r == r1 or r == r2):
+					while(v % p == 0):
+						v //= p
+						cols.append(j+1)
+			u = (A*x + b) % n
+			if(v == 1):
+				rels.append((u, cols, ()))
+			elif(v < LP):
+				rels.append((u, cols, (v,)))
+			elif(double and v < LP*LP and not itools.is_probable_prime(v)):
+				l = rho_pollard_brent(v)
+				if(1 < l < v and l != v//l and max(l, v//l) < LP):
+					rels.append((u, cols, (min(l, v//l), max(l, v//l))))
+			pos = flags.find(1, pos+1)
+	return npolys, rels
+
+
+#relations of random coefficients A, forever
+def _siqs_relations(n, kn, fb, tmem, logp, M, LP, double, seed):
+	rand = random.Random(seed)
+	while(True):
+		yield _siqs_sieve_a(n, kn, fb, tmem, logp, M, LP, double, rand)
+
+
+#combines the partial relations : the large primes are the vertices of a graph, each partial relation an edge
+#(1 stands for "no large prime"). An edge closing a cycle gives a relation where every large prime is squared.
+class _PartialGraph:
+	
+	def __init__(self, n):
+		self.n = n
+		self.parent = {}
+		self.edges = {}
+		self.size = 0
+	
+	def find(self, a):
+		root = a
+		while(self.parent.get(root, root) != root):
+			root = self.parent[root]
+		while(a != root):
+			self.parent[a], a = root, self.parent[a]
+		return root
+	
+	#path of relations between a and b in the spanning forest
+	def path(self, a, b):
+		previous = {a : None}
+		queue = [a]
+		for v in queue:
+			if(v == b):
+				break
+			for w, rel in self.edges.get(v, ()):
+				if(w not in previous):
+					previous[w] = (v, rel)
+					queue.append(w)
+		rels = []
+		while(previous[b] is not None):
+			b, rel = previous[b]
+			rels.append(rel)
+		return rels
+	
+	#returns a combined relation (u, cols, sqrt of the large primes) if rel closes a cycle
+	def add(self, rel):
+		a, b = (1, rel[2][0]) if len(rel[2]) == 1 else rel[2]
+		ra, rb = self.find(a), self.find(b)
+		if(ra != rb):
+			self.parent[ra] = rb
+			self.edges.setdefault(a, []).append((b, rel))
+			self.edges.setdefault(b, []).append((a, rel))
+			self.size += 1
+			return None
+		cycle = self.path(a, b) + [rel]
+		u, cols, large = 1, [], {}
+		for v, c, l in cycle:
+			u = u*v % self.n
+			cols += c
+			for q in l:
+				large[q] = large.get(q, 0) + 1
+		root = 1
+		for q, e in large.items():
+			root = root * pow(q, e//2, self.n) % self.n
+		return (u, cols, root)
+
+
+def siqs(n, jobs=8, stats=None, verbose=False):
+	"""Self-initialising quadratic sieve, with the single and double large prime variations.
+	
+	Args:
+		- *n (int)*: a composite integer, not a prime power (40 to 80 digits are its best range).
+		
+	Optional Args:
+		- *jobs (int)*: number of processes collecting relations (1 : no process).
+		- *stats (dict)*: if given, updated with the progress counters : polynomials, full relations, cycles (combined partials),
+		  partials, relations needed, elapsed time and relations per second.
+		- *verbose (bool)*: set to True if you want a display (the counters every few seconds).
+		
+	Returns:
+		- *(int)*: a non-trivial factor of n, 0 if attack failed.
+	
+	Polynomials (A*x+b)^2 - k*n share A = q1*...*qs, the 2^(s-1) values of b and their roots are switched
+	with a Gray code. The sieve adds the logs with byte translations of whole progressions (sieve[r::p]),
+	and the dependencies come from :func:`gf2.nullspace`.
+	"""
+	
+	t0 = time.monotonic()
+	if(stats is None):
+		stats = {}
+	digits = len(str(n))
+	F, M = next(((F, M) for d, F, M in _SIQS_PARAMETERS if d >= digits), _SIQS_PARAMETERS[-1][1:])
+	k = _siqs_multiplier(n, _TRIAL_PRIMES[:100])
+	kn = k*n
+	fb, tmem, logp = siqs_factor_base(kn, F)
+	for p in fb:
+		if(n % p == 0 and p != n):
+			return p
+	r = itools.isqrt(n)
+	if(r*r == n):
+		return r
+	LP = fb[-1] * 64
+	double = digits >= 50
+	if(verbose): print("siqs : k =",k,", factor base of",F,"primes up to",fb[-1],", M =",M,", double large primes :",double)
+	
+	needed = F + 1 + 32
+	stats.update(polynomials=0, full=0, cycles=0, partials=0, needed=needed, time=0., rate=0.)
+	relations = []
+	seen = set()
+	graph = _PartialGraph(n)
+	if(jobs <= 1):
+		source = _siqs_relations(n, kn, fb, tmem, logp, M, LP, double, random.getrandbits(64))
+		procs = []
+	else:
+		def core(seed, output_queue):
+			for item in _siqs_relations(n, kn, fb, tmem, logp, M, LP, double, seed):
+				output_queue.put(item)
+		queue = Queue()
+		procs = [Process(target=core, args=(random.getrandbits(64), queue)) for j in range(jobs)]
+		for p in procs:
+			p.start()
+		source = iter(queue.get, None)
+	last = t0
+	try:
+		for npolys, rels in source:
+			stats["polynomials"] += npolys
+			for rel in rels:
+				if(rel[0] in seen):
+					continue
+				seen.add(rel[0])
+				if(not rel[2]):
+					relations.append((rel[0], rel[1], 1))
+					stats["full"] += 1
+				else:
+					stats["partials"] += 1
+					combined = graph.add(rel)
+					if(combined is not None):
+						relations.append(combined)
+						stats["cycles"] += 1
+			now = time.monotonic()
+			stats["time"] = now - t0
+			stats["rate"] = len(relations) / stats["time"]
+			if(verbose and now - last > 5):
+				last = now
+				print("siqs : {0}/{1} relations ({2} full, {3} from {4} partials), {5} polynomials, {6:.1f} rel/s".format(
+					len(relations), needed, stats["full"], stats["cycles"], stats["partials"], stats["polynomials"], stats["rate"]))
+			if(len(relations) >= needed):
+				break
+	finally:
+		for p in procs:
+			p.terminate()
+	
+	if(verbose): print("siqs :",len(relations),"relations in {0:.1f} s, linear algebra..".format(time.monotonic()-t0))
+	for dep in gf2.nullspace([cols for u, cols, root in relations], excess=32):
+		X, Y = 1, 1
+		exps = {}
+		for i in dep:
+			u, cols, root = relations[i]
+			X = X*u % n
+			Y = Y*root % n
+			for c in cols:
+				exps[c] = exps.get(c, 0) + 1
+		for c, e in exps.items():
+			if(c > 0):
+				Y = Y * pow(fb[c-1], e//2, n) % n
+		g = itools.gcd(X - Y, n)
+		if(1 < g < n):
+			if(verbose): print("siqs :\n",n,"=",g,"x",n//g)
+			return g
+	if(verbose): print("siqs failed :(")
+	return 0
+
+#n = itools.rand_prime_bits(100)*itools.rand_prime_bits(100)
+#siqs(n,8,verbose=True)
+
 
 #TODO : fonction de facorisation appelant d'abord p-1,p+1, puis rho & ECM puis MPQS
 
@@ -502,12 +1036,32 @@ def dico_add_to_first(d1,d2):
 			
 
 def easy_facto(n,verbose=False):
+	"""Factors an integer.
+	
+	Args:
+		- *n (int)*: a positive integer
+		
+	Optional Args:
+		- *verbose (bool)*: set to True if you want a display.
+		
+	Returns:
+		- *(dict)*: the factorisation of n, {prime : exponent}.
+	
+	Primes below 1000 are removed by trial division, then Brent's rho splits the cofactor.
+	"""
+	
 	dico = {}
 	p = n
-	while(itools.rabin_miller(p,10) == False):
+	for q in _TRIAL_PRIMES:
+		if(q*q > p):
+			break
+		while(p % q == 0):
+			dico[q] = dico.get(q, 0) + 1
+			p = p//q
+	while(p != 1 and not itools.is_probable_prime(p)):
 		q = rho_pollard_brent_p(p,8)
-		if(q != 1):
-			if(itools.rabin_miller(q,10) == True):
+		if(q != 1 and q != p):
+			if(itools.is_probable_prime(q)):
 				if(q in dico.keys()):
 					dico[q] += 1
 				else: